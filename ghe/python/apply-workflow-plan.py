@@ -0,0 +1,57 @@
+import os
+import sys
+import argparse
+
+# Shared GitHub client (pooled session + rate-limit scheduler) lives in pyhon/ghemigr
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "pyhon", "ghemigr"))
+import ghclient
+import workflowplan
+
+# Default GitHub URL (can be overridden via CLI)
+DEFAULT_GITHUB_URL = "https://github.company.com"
+
+# Parse command-line arguments
+parser = argparse.ArgumentParser(description="Apply (disable) or roll back (enable) a workflow plan written by disable-workflow*.py --plan-file.")
+parser.add_argument("--token", required=True, help="GitHub API token with workflow scope")
+parser.add_argument("--github-url", default=DEFAULT_GITHUB_URL, help=f"Base URL of self-hosted GitHub (default: {DEFAULT_GITHUB_URL})")
+parser.add_argument("--plan-file", required=True, help="CSV plan written by the scan")
+parser.add_argument("--action", choices=workflowplan.ACTIONS, default="disable", help="disable to apply the plan, enable to roll it back (default: disable)")
+parser.add_argument("--concurrency", type=int, default=workflowplan.DEFAULT_CONCURRENCY, help=f"Workflows updated in parallel (default: {workflowplan.DEFAULT_CONCURRENCY})")
+parser.add_argument("--retries", type=int, default=ghclient.MAX_RETRIES, help=f"Retries per workflow on connection errors and 5xx responses (default: {ghclient.MAX_RETRIES})")
+parser.add_argument("--dry-run", action="store_true", help="Only print what would be changed")
+args = parser.parse_args()
+
+GITHUB_URL = args.github_url.rstrip("/")  # Remove trailing slash if present
+# The session's retry policy is the only retry layer for the apply phase
+ghclient.configure(pool_maxsize=max(ghclient.POOL_MAXSIZE, args.concurrency), max_retries=args.retries)
+
+headers = {
+    "Authorization": f"Bearer {args.token}",
+    "Accept": "application/vnd.github.v3+json"
+}
+
+entries = workflowplan.read_plan(args.plan_file)
+print(f"Plan {args.plan_file}: {len(entries)} workflows to {args.action}")
+
+if args.dry_run:
+    for entry in entries:
+        print(f"[dry-run] Would {args.action} workflow '{entry['workflow_name']}' in {entry['repo']} ({entry['reason']})")
+    sys.exit(0)
+
+failed = []
+for entry, ok, error in workflowplan.apply_plan(GITHUB_URL, entries, headers, args.action, args.concurrency):
+    if ok:
+        print(f"✅ {args.action.capitalize()}d workflow '{entry['workflow_name']}' in {entry['repo']}")
+    else:
+        print(f"❌ Failed to {args.action} workflow '{entry['workflow_name']}' in {entry['repo']}: {error}")
+        failed.append(entry)
+
+print(f"\n{len(entries) - len(failed)} of {len(entries)} workflows {args.action}d")
+if failed:
+    # Failed entries form a smaller plan that can be re-applied on its own
+    failed_file = f"{args.plan_file}.failed.csv"
+    workflowplan.write_plan(failed_file, failed)
+    print(f"Failed entries written to {failed_file}")
+
+print(f"\nAPI stats: {ghclient.stats.summary()}")
+print(f"Rate-limit stats: {ghclient.scheduler.summary()}")
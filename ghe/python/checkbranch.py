@@ -1,51 +1,40 @@
-import subprocess
+import os
+import sys
+
+# Bulk branch checks and clone-free branch creation live in pyhon/ghemigr
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "pyhon", "ghemigr"))
+from branchcheck import DEFAULT_WORKERS, remote_heads
+from branchcreate import create_branch, create_branches
 
 def branch_exists(remote_url, branch_name):
     """Checks if a branch already exists in the remote repository."""
     try:
-        # Use subprocess to run 'git ls-remote --heads' and capture the output
-        result = subprocess.run(
-            ['git', 'ls-remote', '--heads', remote_url],
-            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
-        )
-        
-        if result.returncode != 0:
-            raise Exception(f"Failed to check branches: {result.stderr}")
-        
-        # Check if the branch name exists in the output
-        return f"refs/heads/{branch_name}" in result.stdout
+        # Exact match against the parsed refs (a substring match also hit e.g. 'feature-x' for 'feature')
+        return branch_name in remote_heads(remote_url, [branch_name])
     except Exception as e:
         print(f"Error checking branches: {e}")
         return False
 
-def create_and_push_branch(remote_url, new_branch):
-    """Clones repo, creates a new branch, and pushes it to the remote repository."""
-    try:
-        # Clone the repository
-        subprocess.run(['git', 'clone', remote_url], check=True)
-        repo_name = remote_url.split('/')[-1].replace('.git', '')
-
-        # Navigate into the repository folder
-        subprocess.run(['cd', repo_name], shell=True, check=True)
-
-        # Check out the default branch (e.g., 'main')
-        subprocess.run(['git', 'checkout', 'main'], check=True)
-
-        # Check if branch already exists
-        if branch_exists(remote_url, new_branch):
-            print(f"Branch '{new_branch}' already exists. Aborting.")
-        else:
-            # Create the new branch
-            subprocess.run(['git', 'checkout', '-b', new_branch], check=True)
-
-            # Push the new branch to the remote
-            subprocess.run(['git', 'push', '--set-upstream', 'origin', new_branch], check=True)
-
-            print(f"Branch '{new_branch}' created and pushed successfully.")
-    except subprocess.CalledProcessError as e:
-        print(f"Error during branch creation: {e}")
-    except Exception as e:
-        print(f"Error: {e}")
+def create_and_push_branch(remote_url, new_branch, base_branch='main', mode='push'):
+    """Creates new_branch off the remote base_branch without cloning the repository."""
+    # One ls-remote resolves the base sha and the existence check; the branch is then
+    # created with a ref-only push (mode='push') or one git refs API call (mode='api', $GITHUB_TOKEN).
+    result = create_branch(remote_url, new_branch, base_branch, mode)
+    if result.status == 'exists':
+        print(f"Branch '{new_branch}' already exists. Aborting.")
+    elif result.status == 'created':
+        print(f"Branch '{new_branch}' created and pushed successfully.")
+    else:
+        print(f"Error during branch creation: {result.detail}")
+    return result
+
+def create_and_push_branches(remote_urls, new_branch, base_branch='main', mode='push', workers=DEFAULT_WORKERS):
+    """Creates new_branch on many repositories in parallel."""
+    results = []
+    for result in create_branches(remote_urls, new_branch, base_branch, mode, workers):
+        print(f"{result.remote_url}: {result.status}")
+        results.append(result)
+    return results
 
 # Example usage
 remote_url = 'git@github.com:user/repo.git'
@@ -1,7 +1,13 @@
-import requests
-import yaml
+import os
+import sys
 import argparse
-import base64
+
+# Shared GitHub client (pooled session + rate-limit scheduler) lives in pyhon/ghemigr
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "pyhon", "ghemigr"))
+import ghclient
+import workflowinventory
+import workflowplan
+from labelcache import LabelCache
 
 # Default GitHub URL (can be overridden via CLI)
 DEFAULT_GITHUB_URL = "https://github.company.com"
@@ -11,15 +17,24 @@ parser = argparse.ArgumentParser(description="Disable GitHub workflows with inva
 parser.add_argument("--token", required=True, help="GitHub API token with workflow scope")
 parser.add_argument("--github-url", default=DEFAULT_GITHUB_URL, help=f"Base URL of self-hosted GitHub (default: {DEFAULT_GITHUB_URL})")
 parser.add_argument("--repos-file", default="repos.txt", help="File containing list of repositories (default: repos.txt)")
+parser.add_argument("--concurrency", type=int, default=1, help="Repositories fetched at once by the async scanner; results stream in completion order (default: 1, serial)")
+parser.add_argument("--label-cache", default="workflow-label-cache.json", help="File caching runner labels by workflow blob sha (default: workflow-label-cache.json)")
+parser.add_argument("--no-label-cache", action="store_true", help="Download and parse every workflow file")
+parser.add_argument("--plan-file", default=None, help="Write the workflows to disable to this CSV plan instead of disabling them (apply with apply-workflow-plan.py)")
 args = parser.parse_args()
 
 GITHUB_TOKEN = args.token
 GITHUB_URL = args.github_url.rstrip("/")  # Remove trailing slash if present
 REPOS_FILE = args.repos_file
+ghclient.configure(pool_maxsize=max(ghclient.POOL_MAXSIZE, args.concurrency))
 
 # List of invalid runner labels
 INVALID_RUNNER_LABELS = {"invalid-runner-1", "invalid-runner-2", "deprecated-runner"}
 
+label_cache = None if args.no_label_cache else LabelCache(args.label_cache, workflowinventory.LABELS_VERSION)
+
+plan = workflowplan.PlanWriter(args.plan_file) if args.plan_file else None
+
 headers = {
     "Authorization": f"Bearer {GITHUB_TOKEN}",
     "Accept": "application/vnd.github.v3+json"
@@ -29,53 +44,56 @@ headers = {
 with open(REPOS_FILE, "r") as f:
     repositories = [line.strip() for line in f if line.strip()]
 
-for repo in repositories:
+if args.concurrency > 1:
+    # Async scanner: many repositories in flight, results as they complete
+    inventory = workflowinventory.async_inventory(GITHUB_URL, repositories, headers, concurrency=args.concurrency, cache=label_cache)
+else:
+    inventory = workflowinventory.rest_inventory(GITHUB_URL, repositories, headers, cache=label_cache)
+
+for scanned, (repo, workflows, error) in enumerate(inventory, 1):
     print(f"\nProcessing repository: {repo}")
-    
-    # Get all workflows in the repository
-    workflow_url = f"{GITHUB_URL}/api/v3/repos/{repo}/actions/workflows"
-    response = requests.get(workflow_url, headers=headers)
+    if label_cache is not None and scanned % 100 == 0:
+        label_cache.save()
 
-    if response.status_code != 200:
-        print(f"❌ Failed to fetch workflows for {repo}: {response.text}")
+    if error is not None:
+        print(f"❌ Failed to fetch workflows for {repo}: {error}")
         continue
 
-    workflows = response.json().get("workflows", [])
-
+    # Resolves matrix/expression runs-on values and follows local reusable workflows
+    analyzer = workflowinventory.repo_analyzer(GITHUB_URL, repo, workflows, headers)
     for workflow in workflows:
-        workflow_id = workflow["id"]
-        workflow_name = workflow["name"]
-        workflow_yaml_url = f"{GITHUB_URL}/api/v3/repos/{repo}/contents/{workflow['path']}"
-
-        # Get workflow YAML content using GitHub API
-        yaml_response = requests.get(workflow_yaml_url, headers=headers)
-
-        if yaml_response.status_code == 200:
-            workflow_content_encoded = yaml_response.json().get("content", "")
-            workflow_content_decoded = base64.b64decode(workflow_content_encoded).decode("utf-8")
-            workflow_content = yaml.safe_load(workflow_content_decoded)
-
-            # Extract runner labels if available
-            runner_labels = set()
-            if "jobs" in workflow_content:
-                for job in workflow_content["jobs"].values():
-                    if "runs-on" in job:
-                        if isinstance(job["runs-on"], list):
-                            runner_labels.update(job["runs-on"])
-                        else:
-                            runner_labels.add(job["runs-on"])
-
-            # Check if any invalid runner label is used
-            if runner_labels & INVALID_RUNNER_LABELS:
+        # Unchanged workflow files (same blob sha) are answered from the label cache
+        analysis = workflowinventory.workflow_labels(workflow, label_cache, analyzer)
+        if analysis is None:
+            print(f"❌ Failed to fetch YAML for workflow: {workflow.name} in {repo}")
+            continue
+        workflow_name, runner_labels, unresolved = analysis
+        if unresolved:
+            print(f"❔ Workflow '{workflow_name}' in {repo} has runner labels only known at run time: {unresolved}")
+
+        # Check if any invalid runner label is used
+        if runner_labels & INVALID_RUNNER_LABELS:
+            reason = f"invalid runner labels: {sorted(runner_labels & INVALID_RUNNER_LABELS)}"
+            if plan is not None:
+                # Plan mode: record the workflow and leave the change to apply-workflow-plan.py
+                print(f"📝 Planning to disable workflow '{workflow_name}' in {repo} due to {reason}")
+                plan.add(repo, workflow.id, workflow_name, workflow.path, reason)
+            else:
                 print(f"⚠️ Disabling workflow '{workflow_name}' in {repo} due to invalid runner labels: {runner_labels & INVALID_RUNNER_LABELS}")
 
                 # Disable the workflow
-                disable_url = f"{GITHUB_URL}/api/v3/repos/{repo}/actions/workflows/{workflow_id}/disable"
-                disable_response = requests.put(disable_url, headers=headers)
+                disable_url = f"{GITHUB_URL}/api/v3/repos/{repo}/actions/workflows/{workflow.id}/disable"
+                disable_response = ghclient.put(disable_url, headers=headers)
 
                 if disable_response.status_code == 204:
                     print(f"✅ Successfully disabled workflow: {workflow_name}")
                 else:
                     print(f"❌ Failed to disable workflow: {workflow_name} - {disable_response.text}")
-        else:
-            print(f"❌ Failed to fetch YAML for workflow: {workflow_name} in {repo}")
\ No newline at end of file
+
+if label_cache is not None:
+    label_cache.save()
+    print(f"Label cache stats: {label_cache.summary()}")
+
+if plan is not None:
+    plan.close()
+    print(f"Plan with {plan.count} workflows to disable written to {plan.path}")
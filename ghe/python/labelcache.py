@@ -0,0 +1,70 @@
+import os
+import json
+import threading
+
+# ----------------- Label Cache ----------------- #
+class LabelCache:
+    """
+    Persistent map of workflow blob SHA -> (workflow name, runs-on labels,
+    unresolved runs-on/uses values).
+
+    A blob SHA identifies the file content, so an entry never goes stale; the
+    whole cache is dropped when version (the label extraction version) changes.
+    The file is rewritten atomically by save().
+    """
+
+    def __init__(self, path, version):
+        self.path = path
+        self.version = version
+        self._lock = threading.Lock()
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+                if data.get("version") == version:
+                    self.entries = data.get("entries", {})
+            except (OSError, ValueError):
+                pass  # unreadable cache: start empty
+
+    def __contains__(self, sha):
+        with self._lock:
+            return sha in self.entries
+
+    def get(self, sha):
+        """Return (name, labels, unresolved) for sha, or None; counts towards the hit rate."""
+        with self._lock:
+            entry = self.entries.get(sha)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry["name"], set(entry["labels"]), set(entry.get("unresolved", []))
+
+    def put(self, sha, name, labels, unresolved=()):
+        with self._lock:
+            self.entries[sha] = {"name": name, "labels": sorted(labels, key=str), "unresolved": sorted(unresolved)}
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"version": self.version, "entries": self.entries}, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def summary(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
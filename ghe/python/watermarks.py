@@ -0,0 +1,51 @@
+import os
+import json
+import threading
+
+# ----------------- Scan Watermarks ----------------- #
+class ScanWatermarks:
+    """
+    Persistent map of repository -> default-branch HEAD sha at its last
+    successful scan, so an incremental sweep can skip unchanged repositories.
+
+    fingerprint describes what a scan decides with (label extraction version,
+    valid/invalid label sets); when it changes every watermark is dropped,
+    because an unchanged repository may now get a different verdict.
+    """
+
+    def __init__(self, path, fingerprint):
+        self.path = path
+        self.fingerprint = fingerprint
+        self._lock = threading.Lock()
+        self.repos = {}
+        self._dirty = False
+        if os.path.exists(path):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+                if data.get("fingerprint") == fingerprint:
+                    self.repos = data.get("repos", {})
+            except (OSError, ValueError):
+                pass  # unreadable watermarks: rescan everything
+
+    def unchanged(self, repo, head):
+        """True if repo was scanned successfully at this HEAD sha."""
+        with self._lock:
+            return head is not None and self.repos.get(repo) == head
+
+    def mark(self, repo, head):
+        if head is None:
+            return
+        with self._lock:
+            self.repos[repo] = head
+            self._dirty = True
+
+    def save(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"fingerprint": self.fingerprint, "repos": self.repos}, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
@@ -0,0 +1,388 @@
+import re
+import json
+import itertools
+from collections import namedtuple
+
+import yaml
+
+MAX_CALL_DEPTH = 4  # nesting limit GitHub applies to reusable workflows
+
+# labels/groups are what the job can run on; unresolved holds the runs-on or uses
+# values that could not be evaluated statically (needs.*, vars.*, remote workflows, ...).
+JobLabels = namedtuple("JobLabels", ["labels", "groups", "unresolved"])
+# dependencies are the other workflow files (paths) the result was derived from.
+WorkflowResult = namedtuple("WorkflowResult", ["name", "jobs", "dependencies"])
+
+def all_labels(result):
+    """Union of the runner labels of all jobs of a WorkflowResult."""
+    return set().union(*(job.labels for job in result.jobs.values()))
+
+# ----------------- Expression Evaluation ----------------- #
+class Unresolved(Exception):
+    """An expression depends on something that is only known at run time."""
+
+UNKNOWN = object()  # a context value that exists but is not known statically
+
+EXPRESSION = re.compile(r"\$\{\{(.*?)\}\}", re.S)
+TOKEN = re.compile(
+    r"\s*(?:(?P<string>'(?:[^']|'')*')|(?P<number>\d+(?:\.\d+)?)"
+    r"|(?P<op>\|\||&&|==|!=|<=|>=|[!()\[\],.<>*])|(?P<ident>[A-Za-z_][\w-]*))"
+)
+
+def _tokens(expression):
+    tokens, pos = [], 0
+    expression = expression.strip()
+    while pos < len(expression):
+        match = TOKEN.match(expression, pos)
+        if not match or match.end() == pos:
+            raise Unresolved(expression)
+        pos = match.end()
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+    return tokens
+
+def _to_str(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    if isinstance(value, (list, dict)):
+        return "Array" if isinstance(value, list) else "Object"
+    return str(value)
+
+def _truthy(value):
+    return value not in (None, False, 0, "")
+
+def _lookup(container, key):
+    if container is UNKNOWN:
+        raise Unresolved(key)
+    if not isinstance(container, dict):
+        return None
+    for name, value in container.items():
+        if str(name).lower() == key.lower():
+            if value is UNKNOWN:
+                raise Unresolved(key)
+            return value
+    return None
+
+def _format(template, *args):
+    out = re.sub(r"\{(\d+)\}", lambda m: _to_str(args[int(m.group(1))]), template.replace("{{", "\0").replace("}}", "\1"))
+    return out.replace("\0", "{").replace("\1", "}")
+
+FUNCTIONS = {
+    "fromjson": lambda value: json.loads(value),
+    "tojson": lambda value: json.dumps(value),
+    "format": _format,
+    "join": lambda values, sep=",": sep.join(_to_str(v) for v in (values if isinstance(values, list) else [values])),
+    "contains": lambda haystack, needle: (
+        needle in haystack if isinstance(haystack, list) else _to_str(needle).lower() in _to_str(haystack).lower()
+    ),
+    "startswith": lambda value, prefix: _to_str(value).lower().startswith(_to_str(prefix).lower()),
+    "endswith": lambda value, suffix: _to_str(value).lower().endswith(_to_str(suffix).lower()),
+}
+
+class _Parser:
+    """Recursive-descent evaluator for the static subset of GitHub expressions."""
+
+    def __init__(self, expression, context):
+        self.tokens = _tokens(expression)
+        self.pos = 0
+        self.context = context
+
+    def peek(self, value=None):
+        if self.pos >= len(self.tokens):
+            return None
+        token = self.tokens[self.pos]
+        return token if value is None or token[1] == value else None
+
+    def take(self, value=None):
+        token = self.peek(value)
+        if token is None:
+            raise Unresolved(value or "end of expression")
+        self.pos += 1
+        return token
+
+    def parse(self):
+        value = self.or_expr()
+        if self.pos != len(self.tokens):
+            raise Unresolved("trailing tokens")
+        return value
+
+    def or_expr(self):
+        value = self.and_expr()
+        while self.peek("||"):
+            self.take()
+            right = self.and_expr()
+            value = value if _truthy(value) else right
+        return value
+
+    def and_expr(self):
+        value = self.compare()
+        while self.peek("&&"):
+            self.take()
+            right = self.compare()
+            value = right if _truthy(value) else value
+        return value
+
+    def compare(self):
+        left = self.unary()
+        token = self.peek()
+        if token and token[1] in ("==", "!=", "<", ">", "<=", ">="):
+            op = self.take()[1]
+            right = self.unary()
+            if op in ("==", "!="):
+                equal = (left.lower() == right.lower()) if isinstance(left, str) and isinstance(right, str) else left == right
+                return equal if op == "==" else not equal
+            try:
+                left, right = float(left), float(right)
+            except (TypeError, ValueError):
+                raise Unresolved(op)
+            return {"<": left < right, ">": left > right, "<=": left <= right, ">=": left >= right}[op]
+        return left
+
+    def unary(self):
+        if self.peek("!"):
+            self.take()
+            return not _truthy(self.unary())
+        return self.postfix()
+
+    def postfix(self):
+        value = self.primary()
+        while True:
+            if self.peek("."):
+                self.take()
+                kind, name = self.take()
+                if kind != "ident":
+                    raise Unresolved(name)
+                value = _lookup(value, name)
+            elif self.peek("["):
+                self.take()
+                key = self.or_expr()
+                self.take("]")
+                value = value[int(key)] if isinstance(value, list) and isinstance(key, (int, float)) else _lookup(value, _to_str(key))
+            else:
+                return value
+
+    def primary(self):
+        kind, text = self.take()
+        if kind == "string":
+            return text[1:-1].replace("''", "'")
+        if kind == "number":
+            return float(text) if "." in text else int(text)
+        if text == "(":
+            value = self.or_expr()
+            self.take(")")
+            return value
+        if kind != "ident":
+            raise Unresolved(text)
+        if text in ("true", "false"):
+            return text == "true"
+        if text == "null":
+            return None
+        if self.peek("("):
+            self.take()
+            args = []
+            while not self.peek(")"):
+                args.append(self.or_expr())
+                if not self.peek(")"):
+                    self.take(",")
+            self.take(")")
+            function = FUNCTIONS.get(text.lower())
+            if function is None:
+                raise Unresolved(text)
+            try:
+                return function(*args)
+            except (TypeError, ValueError, IndexError):
+                raise Unresolved(text)
+        value = _lookup(self.context, text)
+        if value is None:
+            raise Unresolved(text)  # github, needs, vars, secrets, ... are run-time only
+        return value
+
+def evaluate(expression, context):
+    """Evaluate one ${{ }} expression body; raises Unresolved if it is not static."""
+    return _Parser(expression, context).parse()
+
+def interpolate(value, context):
+    """
+    Resolve the expressions in a workflow value. A string that is exactly one
+    expression keeps the expression's type (e.g. a fromJSON array); otherwise
+    expressions are substituted as strings. Lists and mappings are resolved
+    element-wise.
+    """
+    if isinstance(value, str):
+        matches = list(EXPRESSION.finditer(value))
+        if not matches:
+            return value
+        if len(matches) == 1 and matches[0].group(0) == value.strip():
+            return evaluate(matches[0].group(1), context)
+        return EXPRESSION.sub(lambda m: _to_str(evaluate(m.group(1), context)), value)
+    if isinstance(value, list):
+        return [interpolate(item, context) for item in value]
+    if isinstance(value, dict):
+        return {key: interpolate(item, context) for key, item in value.items()}
+    return value
+
+# ----------------- Matrix Expansion ----------------- #
+def matrix_combinations(matrix):
+    """Expand a strategy.matrix mapping (axes, include, exclude) into its job combinations."""
+    if not isinstance(matrix, dict):
+        return [{}]
+    include = matrix.get("include") or []
+    exclude = matrix.get("exclude") or []
+    axes = {key: (values if isinstance(values, list) else [values]) for key, values in matrix.items() if key not in ("include", "exclude")}
+    combos = [dict(zip(axes, values)) for values in itertools.product(*axes.values())] if axes else []
+    combos = [combo for combo in combos if not any(
+        isinstance(entry, dict) and all(combo.get(key) == value for key, value in entry.items()) for entry in exclude
+    )]
+    originals = [dict(combo) for combo in combos]
+    for entry in include if isinstance(include, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        matched = False
+        for combo, original in zip(combos, originals):
+            # An include extends every combination whose original axis values it does not change.
+            if original and all(original[key] == value for key, value in entry.items() if key in original):
+                combo.update({key: value for key, value in entry.items() if key not in original})
+                matched = True
+        if not matched:
+            combos.append(dict(entry))
+            originals.append({})
+    return combos or [{}]
+
+# ----------------- Workflow Analyzer ----------------- #
+def _triggers(content):
+    # YAML 1.1 reads the bare key `on` as True.
+    triggers = content.get("on", content.get(True))
+    return triggers if isinstance(triggers, dict) else {}
+
+def _input_defaults(content):
+    defaults = {}
+    for trigger in ("workflow_call", "workflow_dispatch"):
+        for name, spec in ((_triggers(content).get(trigger) or {}).get("inputs") or {}).items():
+            if isinstance(spec, dict) and "default" in spec and name not in defaults:
+                defaults[name] = spec["default"]
+    return defaults
+
+class WorkflowAnalyzer:
+    """
+    Computes the runner labels of every job of a workflow: runs-on strings,
+    lists and {group, labels} mappings, ${{ }} expressions over matrix and
+    inputs (with matrices expanded, including include/exclude), and jobs that
+    call local reusable workflows (uses: ./.github/workflows/x.yml), which
+    are loaded through load_file(path) and analysed with the caller's with:.
+
+    Results are memoized per (file, inputs), so an analyzer should live as
+    long as one repository's scan.
+    """
+
+    def __init__(self, load_file=None):
+        self.load_file = load_file
+        self._memo = {}
+        self._parsed = {}
+
+    def analyze(self, text, path=None):
+        """Analyze workflow text (or an already parsed mapping) and return a WorkflowResult."""
+        content = yaml.safe_load(text) if isinstance(text, str) else text
+        if path is not None:
+            self._parsed[path] = content
+        return self._analyze_content(content or {}, None, path, ())
+
+    def _load(self, path):
+        if path not in self._parsed:
+            text = self.load_file(path) if self.load_file else None
+            self._parsed[path] = yaml.safe_load(text) if text is not None else None
+        return self._parsed[path]
+
+    def _analyze_content(self, content, inputs, path, stack):
+        key = (path, json.dumps(inputs, sort_keys=True, default=str))
+        if path is not None and key in self._memo:
+            return self._memo[key]
+        if not isinstance(content, dict):
+            content = {}
+
+        context_inputs = _input_defaults(content)
+        if inputs is not None:
+            context_inputs.update(inputs)
+        context = {"inputs": context_inputs}
+
+        jobs, dependencies = {}, set()
+        for job_id, job in (content.get("jobs") or {}).items():
+            if isinstance(job, dict):
+                jobs[job_id] = self._job_labels(job, context, path, stack, dependencies)
+
+        name = content.get("name")
+        result = WorkflowResult(name if isinstance(name, str) else None, jobs, frozenset(dependencies))
+        if path is not None:
+            self._memo[key] = result
+        return result
+
+    def _job_labels(self, job, context, path, stack, dependencies):
+        labels, groups, unresolved = set(), set(), set()
+        matrix = (job.get("strategy") or {}).get("matrix") if isinstance(job.get("strategy"), dict) else None
+        try:
+            combos = matrix_combinations(interpolate(matrix, context)) if matrix is not None else [{}]
+        except Unresolved:
+            combos = [UNKNOWN]  # matrix built at run time: matrix.* cannot be resolved
+
+        for combo in combos:
+            job_context = dict(context, matrix=combo)
+            if "uses" in job:
+                self._called_labels(job, job_context, path, stack, dependencies, labels, groups, unresolved)
+            elif "runs-on" in job:
+                self._runs_on(job["runs-on"], job_context, labels, groups, unresolved)
+        return JobLabels(frozenset(labels), frozenset(groups), frozenset(unresolved))
+
+    def _runs_on(self, value, context, labels, groups, unresolved):
+        if isinstance(value, str):
+            try:
+                value = interpolate(value, context)
+            except Unresolved:
+                unresolved.add(value)
+                return
+            if isinstance(value, str):
+                if value:
+                    labels.add(value)
+                return
+        if isinstance(value, dict):
+            group = value.get("group")
+            if group is not None:
+                try:
+                    groups.add(_to_str(interpolate(group, context)))
+                except Unresolved:
+                    unresolved.add(str(group))
+            self._runs_on(value.get("labels", []), context, labels, groups, unresolved)
+        elif isinstance(value, list):
+            for item in value:
+                self._runs_on(item, context, labels, groups, unresolved)
+        elif value is not None:
+            labels.add(_to_str(value))
+
+    def _called_labels(self, job, context, path, stack, dependencies, labels, groups, unresolved):
+        uses = job["uses"]
+        if not isinstance(uses, str) or not uses.startswith("./") or len(stack) >= MAX_CALL_DEPTH:
+            unresolved.add(str(uses))  # remote reusable workflows are not followed
+            return
+        called_path = uses[2:].split("@", 1)[0]
+        if called_path in stack or called_path == path:
+            unresolved.add(uses)
+            return
+        content = self._load(called_path)
+        if content is None:
+            unresolved.add(uses)
+            return
+        inputs = {}
+        for name, value in (job.get("with") or {}).items():
+            try:
+                inputs[name] = interpolate(value, context)
+            except Unresolved:
+                inputs[name] = UNKNOWN
+        called = self._analyze_content(content, inputs, called_path, stack + ((path,) if path else ()))
+        dependencies.add(called_path)
+        dependencies.update(called.dependencies)
+        for called_job in called.jobs.values():
+            labels.update(called_job.labels)
+            groups.update(called_job.groups)
+            unresolved.update(called_job.unresolved)
@@ -0,0 +1,280 @@
+import base64
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from collections import namedtuple
+
+import ghclient
+from workflowanalyzer import WorkflowAnalyzer, all_labels
+
+WORKFLOWS_DIR = ".github/workflows"
+GRAPHQL_BATCH_SIZE = 25  # repositories per GraphQL query
+DEFAULT_CONCURRENCY = 16  # repositories (or GraphQL batches) scanned at once
+LABELS_VERSION = 2  # bump when the label extraction changes so cached label sets are recomputed
+
+# id is the numeric workflow id (REST) or the workflow file name (GraphQL); the
+# actions/workflows/{id} endpoints accept either. name is None when only the
+# YAML knows it. text is None when the file content could not be fetched or
+# was not downloaded because its blob sha is already in the label cache.
+Workflow = namedtuple("Workflow", ["repo", "id", "name", "path", "sha", "text"])
+RepoInventory = namedtuple("RepoInventory", ["repo", "workflows", "error"])
+
+def workflow_labels(workflow, cache=None, analyzer=None):
+    """
+    Return (name, labels, unresolved) of a workflow, or None if its YAML could not
+    be fetched. labels is the union of the runner labels of all jobs (see
+    workflowanalyzer); unresolved holds runs-on/uses values only known at run time.
+    Blobs already in the label cache are neither downloaded nor parsed again.
+    """
+    if cache is not None and workflow.sha:
+        entry = cache.get(workflow.sha)
+        if entry is not None:
+            yaml_name, labels, unresolved = entry
+            return workflow.name or yaml_name or workflow.path, labels, unresolved
+    if workflow.text is None:
+        return None
+    result = (analyzer or WorkflowAnalyzer()).analyze(workflow.text, workflow.path)
+    labels = all_labels(result)
+    unresolved = set().union(*(job.unresolved for job in result.jobs.values()))
+    # A result that depends on other files (local reusable workflows) is not fully keyed by this blob's sha.
+    if cache is not None and workflow.sha and not result.dependencies:
+        cache.put(workflow.sha, result.name, labels, unresolved)
+    return workflow.name or result.name or workflow.path, labels, unresolved
+
+def repo_analyzer(github_url, repo, workflows, headers):
+    """WorkflowAnalyzer for one repo that loads local reusable workflows from the inventory, else the contents API."""
+    texts = {workflow.path: workflow.text for workflow in workflows if workflow.text is not None}
+
+    def load_file(path):
+        if path not in texts:
+            texts[path], _ = fetch_contents(github_url, repo, path, headers)
+        return texts[path]
+
+    return WorkflowAnalyzer(load_file)
+
+def fetch_contents(github_url, repo, path, headers):
+    """Return (text, sha) of a file via the contents API, or (None, None) on failure."""
+    response = ghclient.get(f"{github_url}/api/v3/repos/{repo}/contents/{path}", headers=headers)
+    if response.status_code != 200:
+        return None, None
+    content = response.json()
+    return base64.b64decode(content.get("content", "")).decode("utf-8"), content.get("sha")
+
+# ----------------- REST Inventory ----------------- #
+def rest_repo_inventory(github_url, repo, headers, cache=None):
+    """
+    Return the RepoInventory of one repo: one workflow list call plus one contents
+    call per workflow. With a label cache, one listing of .github/workflows gives
+    the blob shas and only workflows with uncached blobs are downloaded.
+    """
+    response = ghclient.get(f"{github_url}/api/v3/repos/{repo}/actions/workflows", headers=headers)
+    if response.status_code != 200:
+        return RepoInventory(repo, None, response.text)
+    shas = {}
+    if cache is not None:
+        listing = ghclient.get(f"{github_url}/api/v3/repos/{repo}/contents/{WORKFLOWS_DIR}", headers=headers)
+        if listing.status_code == 200:
+            shas = {entry["path"]: entry["sha"] for entry in listing.json() if entry.get("type") == "file"}
+    workflows = []
+    for workflow in response.json().get("workflows", []):
+        sha = shas.get(workflow["path"])
+        if sha and sha in cache:
+            text = None
+        else:
+            text, sha = fetch_contents(github_url, repo, workflow["path"], headers)
+        workflows.append(Workflow(repo, workflow["id"], workflow["name"], workflow["path"], sha, text))
+    return RepoInventory(repo, workflows, None)
+
+def rest_inventory(github_url, repos, headers, cache=None):
+    """Yield a RepoInventory per repo, one repo at a time."""
+    for repo in repos:
+        yield rest_repo_inventory(github_url, repo, headers, cache)
+
+# ----------------- GraphQL Inventory ----------------- #
+BLOB_FIELDS = "... on Blob { text isTruncated isBinary }"
+
+REPO_QUERY = """
+  r{index}: repository(owner: {owner}, name: {name}) {{
+    object(expression: "HEAD:{path}") {{
+      ... on Tree {{
+        entries {{ name path oid {blob} }}
+      }}
+    }}
+  }}"""
+
+BLOBS_QUERY = """
+  r{index}: repository(owner: {owner}, name: {name}) {{{blobs}
+  }}"""
+
+def _repo_args(repo):
+    owner, name = repo.split("/", 1)
+    # JSON string literals are valid GraphQL string literals.
+    return json.dumps(owner), json.dumps(name)
+
+def build_query(repos, with_text=True):
+    """Query the .github/workflows tree (and, with_text, the blob contents) of each repo."""
+    blob = f"object {{ {BLOB_FIELDS} }}" if with_text else ""
+    parts = []
+    for index, repo in enumerate(repos):
+        owner, name = _repo_args(repo)
+        parts.append(REPO_QUERY.format(index=index, owner=owner, name=name, path=WORKFLOWS_DIR, blob=blob))
+    return "query {" + "".join(parts) + "\n}"
+
+def build_blobs_query(repos, oids_by_index):
+    """Query the contents of the given blob oids, keyed by the repo's index in repos."""
+    parts = []
+    for index, oids in oids_by_index.items():
+        owner, name = _repo_args(repos[index])
+        blobs = "".join(f"\n    b{n}: object(oid: {json.dumps(oid)}) {{ {BLOB_FIELDS} }}" for n, oid in enumerate(oids))
+        parts.append(BLOBS_QUERY.format(index=index, owner=owner, name=name, blobs=blobs))
+    return "query {" + "".join(parts) + "\n}"
+
+def graphql_batch_inventory(github_url, batch, headers, cache=None):
+    """
+    Return a RepoInventory per repo in batch, fetching the workflow file blobs
+    under .github/workflows of all of them with a single GraphQL query.
+    With a label cache the first query only lists the blob oids, and a second
+    query fetches the contents of the blobs that are not cached yet.
+    Blobs GraphQL returns truncated are fetched through the contents API.
+    """
+    graphql_url = f"{github_url}/api/graphql"
+    response = ghclient.post(graphql_url, json={"query": build_query(batch, with_text=cache is None)}, headers=headers)
+    if response.status_code != 200:
+        return [RepoInventory(repo, None, f"GraphQL query failed: {response.text}") for repo in batch]
+    payload = response.json()
+    data = payload.get("data") or {}
+    errors = {error["path"][0]: error["message"] for error in payload.get("errors", []) if error.get("path")}
+
+    entries_by_index = {}
+    for index in range(len(batch)):
+        node = data.get(f"r{index}")
+        if node is not None:
+            entries_by_index[index] = [
+                entry for entry in (node.get("object") or {}).get("entries") or []
+                if entry["name"].endswith((".yml", ".yaml"))
+            ]
+
+    blobs = {}  # oid -> blob fields
+    if cache is not None:
+        missing = {
+            index: [entry["oid"] for entry in entries if entry["oid"] not in cache]
+            for index, entries in entries_by_index.items()
+        }
+        missing = {index: oids for index, oids in missing.items() if oids}
+        if missing:
+            response = ghclient.post(graphql_url, json={"query": build_blobs_query(batch, missing)}, headers=headers)
+            blob_data = (response.json().get("data") or {}) if response.status_code == 200 else {}
+            for index, oids in missing.items():
+                node = blob_data.get(f"r{index}") or {}
+                for n, oid in enumerate(oids):
+                    blobs[oid] = node.get(f"b{n}") or {}
+
+    inventories = []
+    for index, repo in enumerate(batch):
+        if index not in entries_by_index:
+            inventories.append(RepoInventory(repo, None, errors.get(f"r{index}", "repository not returned by GraphQL")))
+            continue
+        workflows = []
+        for entry in entries_by_index[index]:
+            if cache is not None and entry["oid"] in cache:
+                text = None
+            else:
+                blob = entry.get("object") or blobs.get(entry["oid"]) or {}
+                text = blob.get("text")
+                if blob.get("isBinary"):
+                    text = None
+                elif text is None or blob.get("isTruncated"):
+                    text, _ = fetch_contents(github_url, repo, entry["path"], headers)
+            workflows.append(Workflow(repo, entry["name"], None, entry["path"], entry["oid"], text))
+        inventories.append(RepoInventory(repo, workflows, None))
+    return inventories
+
+def batches(repos, batch_size):
+    repos = list(repos)
+    return [repos[start:start + batch_size] for start in range(0, len(repos), batch_size)]
+
+def graphql_inventory(github_url, repos, headers, batch_size=GRAPHQL_BATCH_SIZE, cache=None):
+    """Yield a RepoInventory per repo, one GraphQL query per batch_size repositories."""
+    for batch in batches(repos, batch_size):
+        yield from graphql_batch_inventory(github_url, batch, headers, cache)
+
+# ----------------- Repository Heads ----------------- #
+HEADS_BATCH_SIZE = 100  # repositories per HEAD lookup query
+
+HEAD_QUERY = """
+  r{index}: repository(owner: {owner}, name: {name}) {{
+    defaultBranchRef {{ target {{ oid }} }}
+  }}"""
+
+def repo_heads(github_url, repos, headers, batch_size=HEADS_BATCH_SIZE):
+    """
+    Return {repo: default-branch HEAD sha} with one GraphQL query per batch_size
+    repositories; repos that could not be resolved map to None.
+    """
+    heads = {}
+    for batch in batches(repos, batch_size):
+        parts = []
+        for index, repo in enumerate(batch):
+            owner, name = _repo_args(repo)
+            parts.append(HEAD_QUERY.format(index=index, owner=owner, name=name))
+        response = ghclient.post(f"{github_url}/api/graphql", json={"query": "query {" + "".join(parts) + "\n}"}, headers=headers)
+        data = (response.json().get("data") or {}) if response.status_code == 200 else {}
+        for index, repo in enumerate(batch):
+            ref = (data.get(f"r{index}") or {}).get("defaultBranchRef") or {}
+            heads[repo] = (ref.get("target") or {}).get("oid")
+    return heads
+
+# ----------------- Concurrent Scanner ----------------- #
+async def _fetch(semaphore, func, *args):
+    async with semaphore:
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+def async_inventory(github_url, repos, headers, concurrency=DEFAULT_CONCURRENCY, inventory="rest", batch_size=GRAPHQL_BATCH_SIZE, cache=None):
+    """
+    Yield a RepoInventory per repo in completion order, with up to concurrency
+    repositories (rest) or GraphQL batches (graphql) fetched at once.
+
+    An asyncio event loop schedules the fetches; the HTTP calls themselves go
+    through ghclient on the loop's executor threads, so they share its
+    connection pool and rate-limit scheduler. At most 2 * concurrency fetches
+    are queued at a time, so the repository list can be any iterable.
+    """
+    if inventory == "graphql":
+        units = iter(batches(repos, batch_size))
+        fetch = graphql_batch_inventory
+    else:
+        units = iter(repos)
+        fetch = rest_repo_inventory
+
+    loop = asyncio.new_event_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="scan"))
+    semaphore = asyncio.Semaphore(concurrency)
+    pending = {}  # task -> repository or GraphQL batch
+
+    def fill():
+        for unit in units:
+            pending[loop.create_task(_fetch(semaphore, fetch, github_url, unit, headers, cache))] = unit
+            if len(pending) >= 2 * concurrency:
+                break
+
+    try:
+        fill()
+        while pending:
+            done, _ = loop.run_until_complete(asyncio.wait(set(pending), return_when=asyncio.FIRST_COMPLETED))
+            units_done = [(task, pending.pop(task)) for task in done]
+            fill()
+            for task, unit in units_done:
+                try:
+                    result = task.result()
+                except Exception as e:
+                    # A failed request only fails the repositories of that fetch.
+                    result = [RepoInventory(repo, None, str(e)) for repo in ([unit] if isinstance(unit, str) else unit)]
+                if isinstance(result, RepoInventory):
+                    yield result
+                else:
+                    yield from result
+    finally:
+        for task in pending:
+            task.cancel()
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
@@ -0,0 +1,66 @@
+import csv
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+import ghclient
+
+PLAN_HEADER = ["repo", "workflow_id", "workflow_name", "path", "reason"]
+ACTIONS = ["disable", "enable"]
+DEFAULT_CONCURRENCY = 8
+
+# ----------------- Plan File ----------------- #
+class PlanWriter:
+    """CSV plan of workflows to disable, written row by row while the scan runs."""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = open(path, "w", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(PLAN_HEADER)
+
+    def add(self, repo, workflow_id, workflow_name, path, reason):
+        self._writer.writerow([repo, workflow_id, workflow_name, path, reason])
+        self._file.flush()
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+def read_plan(path):
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+def write_plan(path, entries):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=PLAN_HEADER, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(entries)
+
+# ----------------- Apply Phase ----------------- #
+def set_workflow_state(github_url, entry, headers, action="disable"):
+    """
+    PUT .../actions/workflows/{id}/{action} for one plan entry. Returns (ok, error).
+    Connection errors and 5xx responses are retried by ghclient's session (see
+    ghclient.configure(max_retries=...)), and rate limits are waited out there too.
+    """
+    url = f"{github_url}/api/v3/repos/{entry['repo']}/actions/workflows/{entry['workflow_id']}/{action}"
+    try:
+        response = ghclient.put(url, headers=headers)
+    except requests.exceptions.RequestException as e:
+        return False, str(e)
+    if response.status_code == 204:
+        return True, None
+    return False, f"{response.status_code} {response.text}"
+
+def apply_plan(github_url, entries, headers, action="disable", concurrency=DEFAULT_CONCURRENCY):
+    """Apply action to every plan entry with bounded parallelism; yields (entry, ok, error) as they finish."""
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {
+            executor.submit(set_workflow_state, github_url, entry, headers, action): entry
+            for entry in entries
+        }
+        for future in as_completed(futures):
+            ok, error = future.result()
+            yield futures[future], ok, error
@@ -1,4 +1,8 @@
+from sshpool import SSHConnectionPool
+
 def ssh_and_manage_directories(csv_filename, privkey_path, pod, action):
+    # One SSH transport per FQDN, shared by all executor rows on that host
+    pool = SSHConnectionPool(username='ejen', key_filename=privkey_path)
     try:
         with open(csv_filename, mode='r') as file:
             reader = csv.DictReader(file)
@@ -15,14 +19,9 @@ def ssh_and_manage_directories(csv_filename, privkey_path, pod, action):
                 remote_workspace = f"/workerfs{pod}/workspace/{url_string}"
                 symlink_target = f"/apps/jenkins/pipeline-worker/executors/{executorsubDir}/workspace/{url_string}"
 
-                # Establish SSH connection
-                ssh = paramiko.SSHClient()
-                ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                ssh.connect(fqdn, username='ejen', key_filename=privkey_path)
-
                 # Validate or execute based on the action argument
                 if action == 'validate':
-                    stdin, stdout, stderr = ssh.exec_command(f'''
+                    status, result, errors = pool.exec_command(fqdn, f'''
                         if [ -L {symlink_target} ]; then 
                             echo "OK - Link exists: {symlink_target} -> $(readlink -f {symlink_target})"; 
                         elif [ -d {symlink_target} ]; then 
@@ -31,11 +30,10 @@ def ssh_and_manage_directories(csv_filename, privkey_path, pod, action):
                             echo "MISSING - {symlink_target} does not exist"; 
                         fi
                     ''')
-                    result = stdout.read().decode().strip()
                     print(f"{fqdn}: {result}")
 
                 elif action == 'execute':
-                    stdin, stdout, stderr = ssh.exec_command(f'''
+                    status, result, errors = pool.exec_command(fqdn, f'''
                         mkdir -p {remote_workspace};
                         if [ -L {symlink_target} ]; then 
                             echo "OK - Link exists: {symlink_target} -> $(readlink -f {symlink_target})"; 
@@ -49,9 +47,9 @@ def ssh_and_manage_directories(csv_filename, privkey_path, pod, action):
                             echo "MISSING - {symlink_target} does not exist"; 
                         fi
                     ''')
-                    result = stdout.read().decode().strip()
                     print(f"{fqdn}: {result}")
-
-                ssh.close()
     except Exception as e:
-        print(f"An error occurred during SSH operations: {e}")
\ No newline at end of file
+        print(f"An error occurred during SSH operations: {e}")
+    finally:
+        pool.close()
+        print(f"SSH pool: {pool.summary()}")
\ No newline at end of file
@@ -1,29 +1,22 @@
-import requests
-from requests.auth import HTTPBasicAuth
 import sys
 import csv
 import os
-import paramiko
 
-# Base URL pattern for Jenkins instances
-BASE_URL = 'https://jenkins-{}.company.net'
+# Node listing (tree= trimmed, streamed, pooled session)
+from jenkinsinventory import fetch_nodes
+from nodeclassifier import get_classifier
+from sshpool import CONNECT_TIMEOUT, SSHConnectionPool
+from sshfanout import DEFAULT_PARALLELISM, HOST_TIMEOUT, fan_out
 
-# Endpoint to get the list of nodes/agents
-NODES_ENDPOINT_TEMPLATE = '{}/computer/api/json'
-
-# List of patterns to filter node names
-NODE_NAME_PATTERNS = ['cpvra', 'crvra', 'cuvra', 'ccvra']
+# Node name patterns come from JENKINS_NODE_PATTERNS (default cpvra,crvra,cuvra,ccvra)
+classifier = get_classifier()
 
 def get_jenkins_nodes(instance_name, username, api_token, pod):
-    jenkins_url = BASE_URL.format(instance_name)
-    nodes_endpoint = NODES_ENDPOINT_TEMPLATE.format(jenkins_url)
-    
     try:
-        # Make the API call, bypassing SSL verification
-        response = requests.get(nodes_endpoint, auth=HTTPBasicAuth(username, api_token), verify=False)
+        result = fetch_nodes(instance_name, username, api_token)
 
-        if response.status_code == 200:
-            nodes = response.json()['computer']
+        if result.error is None:
+            nodes = result.nodes
 
             # Create a CSV file with the instance name in the filename
             csv_filename = f'jenkins_nodes_{instance_name}.csv'
@@ -31,31 +24,29 @@ def get_jenkins_nodes(instance_name, username, api_token, pod):
                 writer = csv.writer(file)
                 writer.writerow(['Node Name', 'Number of Executors', 'URL String', 'FQDN', 'Executor SubDir'])
 
-                for node in nodes:
-                    node_name = node['displayName']
-                    if node.get('launchSupported', False) and any(node_name.startswith(pattern) for pattern in NODE_NAME_PATTERNS):
-                        fqdn = f"{node_name.split('-')[0]}.company.net"
-                        executorsubDir = node_name.split('-')[1] if '-' in node_name else ''
-                        
-                        # Skip processing if executorsubDir is empty
-                        if not executorsubDir:
-                            continue
-                        
-                        url_string = f"Jenkins-{instance_name}"
+                for node, info in classifier.select(nodes):
+                    # Skip processing if executorsubDir is empty
+                    if not info.subdir:
+                        continue
+
+                    url_string = f"Jenkins-{instance_name}"
 
-                        writer.writerow([node_name, node['numExecutors'], url_string, fqdn, executorsubDir])
+                    writer.writerow([info.name, node['numExecutors'], url_string, info.fqdn, info.subdir])
 
             return csv_filename
         else:
-            print(f"Failed to retrieve nodes. Status Code: {response.status_code}")
-            print(f"Response: {response.text}")
+            print(f"Failed to retrieve nodes. {result.error}")
             return None
     except Exception as e:
         print(f"An error occurred: {e}")
         return None
 
-def ssh_and_manage_directories(csv_filename, privkey_path, pod, action):
+def ssh_and_manage_directories(csv_filename, privkey_path, pod, action, parallelism=DEFAULT_PARALLELISM, host_timeout=HOST_TIMEOUT):
+    # One SSH transport per FQDN, shared by all executor rows on that host
+    pool = SSHConnectionPool(username='ejen', key_filename=privkey_path, connect_timeout=min(CONNECT_TIMEOUT, host_timeout))
     try:
+        lines = []  # skip messages and row indices into the fan-out results, in CSV order
+        rows = []
         with open(csv_filename, mode='r') as file:
             reader = csv.DictReader(file)
             for row in reader:
@@ -65,31 +56,40 @@ def ssh_and_manage_directories(csv_filename, privkey_path, pod, action):
                 
                 # Skip processing if executorsubDir is empty
                 if not executorsubDir:
-                    print(f"Skipping node {row['Node Name']} as Executor SubDir is empty.")
+                    lines.append(f"Skipping node {row['Node Name']} as Executor SubDir is empty.")
                     continue
                 
                 remote_workspace = f"/workerfs{pod}/workspace/{url_string}"
                 symlink_target = f"/apps/jenkins/pipeline-worker/executors/{executorsubDir}/workspace/{url_string}"
 
-                # Establish SSH connection
-                ssh = paramiko.SSHClient()
-                ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                ssh.connect(fqdn, username='ejen', key_filename=privkey_path)
-
                 # Validate or execute based on the action argument
                 if action == 'validate':
-                    stdin, stdout, stderr = ssh.exec_command(f'if [ -L {symlink_target} ]; then echo "OK - Link exists: {symlink_target}"; elif [ -d {symlink_target} ]; then echo "DIR - Directory exists: {symlink_target}"; else echo "MISSING"; fi')
-                    result = stdout.read().decode().strip()
-                    print(f"{fqdn}: {result}")
+                    commands = [f'if [ -L {symlink_target} ]; then echo "OK - Link exists: {symlink_target}"; elif [ -d {symlink_target} ]; then echo "DIR - Directory exists: {symlink_target}"; else echo "MISSING"; fi']
                 elif action == 'execute':
-                    ssh.exec_command(f'mkdir -p {remote_workspace}')
-                    stdin, stdout, stderr = ssh.exec_command(f'if [ -L {symlink_target} ]; then echo "OK - Link exists: {symlink_target}"; elif [ -d {symlink_target} ]; then rm -rf {symlink_target}; ln -s {remote_workspace} {symlink_target}; echo "Created symlink: {symlink_target} -> {remote_workspace}"; elif [ ! -d {remote_workspace} ]; then ln -s {remote_workspace} {symlink_target}; echo "Created target and symlink: {symlink_target} -> {remote_workspace}"; else echo "MISSING"; fi')
-                    result = stdout.read().decode().strip()
-                    print(f"{fqdn}: {result}")
-
-                ssh.close()
+                    commands = [f'mkdir -p {remote_workspace}',
+                                f'if [ -L {symlink_target} ]; then echo "OK - Link exists: {symlink_target}"; elif [ -d {symlink_target} ]; then rm -rf {symlink_target}; ln -s {remote_workspace} {symlink_target}; echo "Created symlink: {symlink_target} -> {remote_workspace}"; elif [ ! -d {remote_workspace} ]; then ln -s {remote_workspace} {symlink_target}; echo "Created target and symlink: {symlink_target} -> {remote_workspace}"; else echo "MISSING"; fi']
+                lines.append(len(rows))
+                rows.append((fqdn, commands))
+
+        # Hosts run concurrently; output is printed afterwards in CSV order
+        results = fan_out(pool, rows, parallelism, host_timeout)
+        for line in lines:
+            if isinstance(line, str):
+                print(line)
+                continue
+            result = results[line]
+            if result.error is None:
+                print(f"{result.fqdn}: {result.output}")
+            else:
+                print(f"{result.fqdn}: ERROR - {result.error}")
+        failed_hosts = sorted({result.fqdn for result in results if result.error is not None})
+        if failed_hosts:
+            print(f"{len(failed_hosts)} hosts failed: {', '.join(failed_hosts)}")
     except Exception as e:
         print(f"An error occurred during SSH operations: {e}")
+    finally:
+        pool.close()
+        print(f"SSH pool: {pool.summary()}")
 
 if __name__ == "__main__":
     import argparse
@@ -101,9 +101,11 @@ if __name__ == "__main__":
     parser.add_argument('--privkey', required=True, help="Path to the SSH private key")
     parser.add_argument('--pod', required=True, help="Pod name for workspace directory")
     parser.add_argument('--action', required=True, choices=['execute', 'validate'], help="Action to perform: execute or validate")
+    parser.add_argument('--parallelism', type=int, default=DEFAULT_PARALLELISM, help=f"Hosts worked on concurrently (default: {DEFAULT_PARALLELISM})")
+    parser.add_argument('--host-timeout', type=float, default=HOST_TIMEOUT, help=f"Seconds allowed for all commands on one host (default: {HOST_TIMEOUT:.0f})")
 
     args = parser.parse_args()
 
     csv_file = get_jenkins_nodes(args.instance, args.user, args.token, args.pod)
     if csv_file:
-        ssh_and_manage_directories(csv_file, args.privkey, args.pod, args.action)
\ No newline at end of file
+        ssh_and_manage_directories(csv_file, args.privkey, args.pod, args.action, args.parallelism, args.host_timeout)
\ No newline at end of file
@@ -1,48 +1,53 @@
-import requests
-from requests.auth import HTTPBasicAuth
 import sys
+import logging
 
-# Base URL pattern for Jenkins instances
-BASE_URL = 'https://jenkins-{}.company.net'
+# Concurrent multi-instance queries over a pooled session
+from jenkinsinventory import DEFAULT_WORKERS, fetch_nodes, fetch_all, parse_instances, print_summary
+from nodeclassifier import get_classifier
 
-# Endpoint to get the list of nodes/agents
-NODES_ENDPOINT_TEMPLATE = '{}/computer/api/json'
+# Node name patterns come from JENKINS_NODE_PATTERNS (default cpvra,crvra,cuvra,ccvra)
+classifier = get_classifier()
 
-# List of patterns to filter node names
-NODE_NAME_PATTERNS = ['cpvra', 'crvra', 'cuvra', 'ccvra']
+def print_nodes(instance_name, nodes):
+    print(f"List of Jenkins Nodes/Agents for {instance_name} with 'launchSupported': true and matching name patterns:")
+    for node, info in classifier.select(nodes):
+        node_name = info.name
+        print(f"Node Name: {node_name}")
+        print(f"Is Offline: {node['offline']}")
+        print(f"Number of Executors: {node['numExecutors']}")
+        print('-' * 40)
 
 def get_jenkins_nodes(instance_name, username, api_token):
-    jenkins_url = BASE_URL.format(instance_name)
-    nodes_endpoint = NODES_ENDPOINT_TEMPLATE.format(jenkins_url)
-    
-    try:
-        # Make the API call, bypassing SSL verification
-        response = requests.get(nodes_endpoint, auth=HTTPBasicAuth(username, api_token), verify=False)
-
-        # Check if the request was successful
-        if response.status_code == 200:
-            nodes = response.json()['computer']
-            print(f"List of Jenkins Nodes/Agents for {instance_name} with 'launchSupported': true and matching name patterns:")
-            for node in nodes:
-                node_name = node['displayName']
-                if node.get('launchSupported', False) and any(node_name.startswith(pattern) for pattern in NODE_NAME_PATTERNS):
-                    print(f"Node Name: {node_name}")
-                    print(f"Is Offline: {node['offline']}")
-                    print(f"Number of Executors: {node['numExecutors']}")
-                    print('-' * 40)
-        else:
-            print(f"Failed to retrieve nodes. Status Code: {response.status_code}")
-            print(f"Response: {response.text}")
-    except Exception as e:
-        print(f"An error occurred: {e}")
+    result = fetch_nodes(instance_name, username, api_token)
+    if result.error is None:
+        print_nodes(instance_name, result.nodes)
+    else:
+        print(f"Failed to retrieve nodes. {result.error}")
+
+def get_jenkins_nodes_multi(instances, username, api_token, workers=DEFAULT_WORKERS):
+    """Query all instances concurrently, then print one merged inventory and a per-instance summary."""
+    results = fetch_all(instances, username, api_token, workers)
+    for result in results:
+        if result.error is None:
+            print_nodes(result.instance, result.nodes)
+    print_summary(results)
+    return results
 
 if __name__ == "__main__":
-    if len(sys.argv) != 4:
-        print("Usage: python script.py <instance_name> <username> <api_token>")
+    if len(sys.argv) not in (4, 5):
+        print("Usage: python script.py <instance_name>[,<instance_name>...|@instances_file] <username> <api_token> [workers]")
         sys.exit(1)
-    
-    instance_name = sys.argv[1]
+
+    instances = parse_instances(sys.argv[1])
     username = sys.argv[2]
     api_token = sys.argv[3]
+    workers = int(sys.argv[4]) if len(sys.argv) == 5 else DEFAULT_WORKERS
+
+    # Payload size and fetch time per instance are logged at INFO
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
-    get_jenkins_nodes(instance_name, username, api_token)
\ No newline at end of file
+    if len(instances) == 1:
+        get_jenkins_nodes(instances[0], username, api_token)
+    else:
+        results = get_jenkins_nodes_multi(instances, username, api_token, workers)
+        sys.exit(1 if any(result.error for result in results) else 0)
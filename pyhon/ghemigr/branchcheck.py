@@ -0,0 +1,85 @@
+import os
+import sys
+import logging
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+logger = logging.getLogger(__name__)
+
+# ----------------- Check Settings ----------------- #
+DEFAULT_WORKERS = int(os.getenv("GHEMIGR_BRANCHCHECK_WORKERS", "16"))
+LS_REMOTE_TIMEOUT = float(os.getenv("GHEMIGR_LS_REMOTE_TIMEOUT", "60"))
+MAX_REF_PATTERNS = 50  # above this, list all heads instead of passing one pattern per branch
+
+def remote_head_shas(remote_url, branches=None, timeout=LS_REMOTE_TIMEOUT):
+    """
+    Return {branch: sha} for the heads on remote_url from a single git ls-remote --heads.
+    When a few branches are given they are passed as ref patterns, so the server
+    only advertises those refs instead of every head of the repository.
+    """
+    command = ["git", "ls-remote", "--heads", remote_url]
+    if branches and len(branches) <= MAX_REF_PATTERNS:
+        command += [f"refs/heads/{branch}" for branch in branches]
+    # Never block on a credential prompt while running unattended.
+    env = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, timeout=timeout, env=env)
+    if result.returncode != 0:
+        raise RuntimeError(f"git ls-remote failed for {remote_url}: {result.stderr.strip()}")
+    heads = {}
+    for line in result.stdout.splitlines():
+        sha, _, ref = line.partition("\t")
+        if ref.startswith("refs/heads/"):
+            heads[ref[len("refs/heads/"):]] = sha
+    return heads
+
+def remote_heads(remote_url, branches=None, timeout=LS_REMOTE_TIMEOUT):
+    """Return the set of branch names on remote_url (see remote_head_shas)."""
+    return set(remote_head_shas(remote_url, branches, timeout))
+
+def branches_exist(pairs, workers=DEFAULT_WORKERS):
+    """
+    Check many (remote_url, branch) pairs with one ls-remote per distinct remote,
+    run across remotes in a thread pool. Returns {(remote_url, branch): bool},
+    or None for pairs whose remote could not be listed.
+    """
+    by_remote = {}
+    for remote_url, branch in pairs:
+        by_remote.setdefault(remote_url, set()).add(branch)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            executor.submit(remote_heads, remote_url, sorted(branches)): remote_url
+            for remote_url, branches in by_remote.items()
+        }
+        for future in as_completed(futures):
+            remote_url = futures[future]
+            try:
+                heads = future.result()
+            except (RuntimeError, OSError, subprocess.TimeoutExpired) as e:
+                logger.error(f"Error checking branches of {remote_url}: {e}")
+                heads = None
+            for branch in by_remote[remote_url]:
+                results[(remote_url, branch)] = None if heads is None else branch in heads
+    return results
+
+# ----------------- Pre-flight CLI ----------------- #
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check which branches exist on many remotes")
+    parser.add_argument("pairs_file", help="File with one '<remote_url> <branch>' pair per line")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"Remotes checked in parallel (default: {DEFAULT_WORKERS})")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    pairs = []
+    with open(args.pairs_file) as f:
+        for line in f:
+            parts = line.split(None, 1)
+            if len(parts) == 2:
+                pairs.append((parts[0], parts[1].strip()))
+    results = branches_exist(pairs, workers=args.workers)
+    for remote_url, branch in pairs:
+        exists = results[(remote_url, branch)]
+        print(f"{remote_url}\t{branch}\t{'error' if exists is None else 'exists' if exists else 'missing'}")
+    sys.exit(1 if None in results.values() else 0)
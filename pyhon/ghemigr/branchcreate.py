@@ -0,0 +1,132 @@
+import os
+import sys
+import shutil
+import logging
+import argparse
+import tempfile
+import subprocess
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+import requests
+
+import ghclient
+from branchcheck import DEFAULT_WORKERS, remote_head_shas
+from mirrorcache import MIRROR_DIR, MirrorCache
+
+logger = logging.getLogger(__name__)
+
+MODES = ["api", "push"]
+
+# status is "created", "exists" or "failed"; detail holds the new sha or the error.
+BranchResult = namedtuple("BranchResult", ["remote_url", "branch", "status", "detail"])
+
+def repo_from_url(remote_url):
+    """'git@host:owner/repo.git' or 'https://host/owner/repo.git' -> ('host', 'owner/repo')."""
+    if "://" in remote_url:
+        parts = urlsplit(remote_url)
+        host, path = parts.hostname, parts.path
+    else:
+        host, _, path = remote_url.partition(":")
+        host = host.rpartition("@")[2]
+    path = path.strip("/")
+    if path.endswith(".git"):
+        path = path[:-len(".git")]
+    return host, "/".join(path.split("/")[-2:])
+
+def api_url_for(host):
+    return "https://api.github.com" if host == "github.com" else f"https://{host}/api/v3"
+
+# ----------------- Ref Creation ----------------- #
+def create_ref_via_api(remote_url, new_branch, sha, api_key, api_url=None):
+    """Create refs/heads/new_branch at sha with one POST to the git refs API."""
+    host, repo = repo_from_url(remote_url)
+    url = f"{api_url or api_url_for(host)}/repos/{repo}/git/refs"
+    headers = {"Authorization": f"token {api_key}"}
+    response = ghclient.post(url, json={"ref": f"refs/heads/{new_branch}", "sha": sha}, headers=headers)
+    if response.status_code == 422 and "already exists" in response.text:
+        return "exists"
+    response.raise_for_status()
+    return "created"
+
+def create_ref_via_push(remote_url, new_branch, base_branch, sha, mirror_cache=None):
+    """
+    Push sha to refs/heads/new_branch. The commit comes from the shared mirror when
+    one is given, otherwise from a depth-1 fetch of base_branch into a scratch repo.
+    """
+    if mirror_cache is not None:
+        _, repo = repo_from_url(remote_url)
+        # Push inside the lease so the mirror cannot be evicted mid-push
+        with mirror_cache.lease(repo, remote_url) as mirror:
+            subprocess.check_call(["git", "push", "--quiet", remote_url, f"{sha}:refs/heads/{new_branch}"], cwd=mirror)
+        return "created"
+    scratch = tempfile.mkdtemp(prefix="branchcreate-")
+    try:
+        subprocess.check_call(["git", "init", "--bare", "--quiet", scratch])
+        subprocess.check_call(["git", "fetch", "--quiet", "--depth=1", remote_url, f"refs/heads/{base_branch}"], cwd=scratch)
+        subprocess.check_call(["git", "push", "--quiet", remote_url, f"{sha}:refs/heads/{new_branch}"], cwd=scratch)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return "created"
+
+def create_branch(remote_url, new_branch, base_branch="main", mode="api", api_key=None, api_url=None, mirror_cache=None):
+    """
+    Create new_branch off the remote base_branch without a working clone.
+    One ls-remote returns both the base sha and whether new_branch already exists;
+    the branch is then created with one refs API call (api) or a ref-only push (push).
+    """
+    try:
+        shas = remote_head_shas(remote_url, [base_branch, new_branch])
+        if new_branch in shas:
+            return BranchResult(remote_url, new_branch, "exists", shas[new_branch])
+        if base_branch not in shas:
+            return BranchResult(remote_url, new_branch, "failed", f"base branch '{base_branch}' not found")
+        sha = shas[base_branch]
+        if mode == "api":
+            status = create_ref_via_api(remote_url, new_branch, sha, api_key or os.getenv("GITHUB_TOKEN"), api_url)
+        else:
+            status = create_ref_via_push(remote_url, new_branch, base_branch, sha, mirror_cache)
+        return BranchResult(remote_url, new_branch, status, sha)
+    except (RuntimeError, OSError, subprocess.SubprocessError, requests.exceptions.RequestException) as e:
+        return BranchResult(remote_url, new_branch, "failed", str(e))
+
+def create_branches(remote_urls, new_branch, base_branch="main", mode="api", workers=DEFAULT_WORKERS, **kwargs):
+    """Create new_branch on many repositories in parallel; yields a BranchResult per repo as it finishes."""
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = [
+            executor.submit(create_branch, remote_url, new_branch, base_branch, mode, **kwargs)
+            for remote_url in remote_urls
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            if result.status == "failed":
+                logger.error(f"Failed to create branch '{new_branch}' on {result.remote_url}: {result.detail}")
+            yield result
+
+# ----------------- Bulk CLI ----------------- #
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create a branch off the remote base branch on many repositories, without cloning")
+    parser.add_argument("remotes_file", help="File with one remote URL per line")
+    parser.add_argument("--branch", required=True, help="Branch to create")
+    parser.add_argument("--base", default="main", help="Branch to create it from (default: main)")
+    parser.add_argument("--mode", choices=MODES, default="api", help="api: one POST to the git refs API per repo; push: ref-only git push (default: api)")
+    parser.add_argument("--token", default=os.getenv("GITHUB_TOKEN"), help="API token for --mode api (default: $GITHUB_TOKEN)")
+    parser.add_argument("--api-url", help="API base URL (default: derived from each remote's host)")
+    parser.add_argument("--mirror-dir", help=f"Push from shared bare mirrors under this directory (e.g. {MIRROR_DIR}) instead of a scratch depth-1 fetch")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"Repositories handled in parallel (default: {DEFAULT_WORKERS})")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if args.mode == "api" and not args.token:
+        parser.error("--mode api needs --token or $GITHUB_TOKEN")
+    ghclient.configure(pool_maxsize=max(ghclient.POOL_MAXSIZE, args.workers))
+    with open(args.remotes_file) as f:
+        remotes = [line.strip() for line in f if line.strip()]
+    mirror_cache = MirrorCache(args.mirror_dir) if args.mirror_dir else None
+    failed = 0
+    for result in create_branches(remotes, args.branch, args.base, args.mode, args.workers,
+                                  api_key=args.token, api_url=args.api_url, mirror_cache=mirror_cache):
+        print(f"{result.remote_url}\t{result.branch}\t{result.status}\t{result.detail}")
+        failed += result.status == "failed"
+    sys.exit(1 if failed else 0)
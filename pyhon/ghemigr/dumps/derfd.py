@@ -1,6 +1,13 @@
 import csv
-import requests
+import os
+import sys
 import logging
+import requests
+
+# Shared modules live one level up in pyhon/ghemigr
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ghclient
+import teamindex
 
 # Initialize logging (reuse the existing configuration)
 logging.basicConfig(filename='execution.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -12,21 +19,12 @@ ORG_NAME = "your_organization"
 # Your personal access token with 'repo', 'admin:org' permissions
 GITHUB_TOKEN = "your_personal_access_token"
 
-# Function to check if a specific team exists
+# Function to check if a specific team exists (answered from the cached org team index)
 def team_exists(team_slug):
-    headers = {
-        "Authorization": f"token {GITHUB_TOKEN}",
-        "Accept": "application/vnd.github.v3+json"
-    }
-    check_team_url = f"{GITHUB_API_URL}/orgs/{ORG_NAME}/teams/{team_slug}"
-    response = requests.get(check_team_url, headers=headers)
-    
-    if response.status_code == 200:
-        return True  # Team exists
-    elif response.status_code == 404:
-        return False  # Team does not exist
-    else:
-        logging.error(f"Error checking if team exists: {response.status_code}")
+    try:
+        return teamindex.get_index(ORG_NAME, GITHUB_TOKEN).find(team_slug) is not None
+    except requests.exceptions.RequestException as e:
+        logging.error(f"Error checking if team exists: {e}")
         return None
 
 # Function to create a team, add members, and set permissions
@@ -36,6 +34,8 @@ def manage_teams_and_permissions(csv_file_path):
         "Accept": "application/vnd.github.v3+json"
     }
 
+    index = teamindex.get_index(ORG_NAME, GITHUB_TOKEN)
+
     # Read the CSV report file
     with open(csv_file_path, newline='') as csvfile:
         reader = csv.DictReader(csvfile)
@@ -48,40 +48,24 @@ def manage_teams_and_permissions(csv_file_path):
             new_branch = row['new_branch']
             pull_request_url = row['pull_request_url']
 
-            # Step 1: Check if team exists using the slug
-            team_slug = team_name.lower().replace(' ', '-')
+            # Step 1/2: Look the team up in the org index and create it only if it is missing
             logging.info(f"Checking if team '{team_name}' exists...")
+            try:
+                team_slug = index.ensure_team(
+                    team_name,
+                    repo_names=[f"{ORG_NAME}/{repo_name}"],
+                    permission="push"  # Read/write access
+                )
+            except requests.exceptions.RequestException as e:
+                logging.error(f"Failed to create team '{team_name}': {e}")
+                continue
 
-            if team_exists(team_slug):
-                logging.info(f"Team '{team_name}' already exists with slug '{team_slug}'.")
-            else:
-                # Step 2: Create team if it doesn't exist
-                logging.info(f"Creating new team '{team_name}'.")
-                create_team_url = f"{GITHUB_API_URL}/orgs/{ORG_NAME}/teams"
-                team_payload = {
-                    "name": team_name,
-                    "repo_names": [f"{ORG_NAME}/{repo_name}"],
-                    "permission": "push"  # Read/write access
-                }
-
-                team_response = requests.post(create_team_url, json=team_payload, headers=headers)
-                if team_response.status_code == 201:
-                    logging.info(f"Team '{team_name}' created successfully.")
-                    team_data = team_response.json()
-                    team_slug = team_data['slug']
-                else:
-                    logging.error(f"Failed to create team '{team_name}'. Status Code: {team_response.status_code}")
-                    continue
-
-            # Step 3: Add users to the team
-            for user in users:
-                logging.info(f"Adding user '{user}' to team '{team_name}'.")
-                add_user_url = f"{GITHUB_API_URL}/orgs/{ORG_NAME}/teams/{team_slug}/memberships/{user}"
-                add_user_response = requests.put(add_user_url, headers=headers)
-                if add_user_response.status_code == 200:
-                    logging.info(f"User '{user}' added to team '{team_name}'.")
-                else:
-                    logging.error(f"Failed to add user '{user}' to team '{team_name}'. Status Code: {add_user_response.status_code}")
+            # Step 3: Add only the users that are not on the team yet
+            try:
+                added = index.ensure_members(team_slug, users)
+                logging.info(f"Team '{team_name}' reconciled, added users: {added or 'none'}.")
+            except requests.exceptions.RequestException as e:
+                logging.error(f"Failed to add users to team '{team_name}': {e}")
 
             # Step 4: Grant read/write access to the repo for the team
             logging.info(f"Granting read/write access to team '{team_name}' for repository '{repo_name}'.")
@@ -89,7 +73,7 @@ def manage_teams_and_permissions(csv_file_path):
             access_payload = {
                 "permission": "push"  # Grant push (read/write) access
             }
-            access_response = requests.put(grant_access_url, json=access_payload, headers=headers)
+            access_response = ghclient.put(grant_access_url, json=access_payload, headers=headers)
             if access_response.status_code == 204:
                 logging.info(f"Granted read/write access to team '{team_name}' for repository '{repo_name}'.")
             else:
@@ -97,4 +81,6 @@ def manage_teams_and_permissions(csv_file_path):
 
 # Example usage
 csv_file_path = 'report.csv'
-manage_teams_and_permissions(csv_file_path)
\ No newline at end of file
+manage_teams_and_permissions(csv_file_path)
+teamindex.log_stats()
+ghclient.log_stats()
\ No newline at end of file
@@ -0,0 +1,190 @@
+import threading
+import logging
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+import ghclient
+import teamindex
+
+logger = logging.getLogger(__name__)
+
+GITHUB_API_URL = "https://api.github.com"
+
+# One environment that needs a write: created and/or given extra reviewer teams.
+EnvChange = namedtuple("EnvChange", ["repo", "environment", "create", "add_teams"])
+
+def reviewer_teams(environment):
+    """Return the slugs of the teams that are required reviewers of an environment."""
+    return {
+        reviewer["reviewer"]["slug"]
+        for rule in environment.get("protection_rules", [])
+        if rule.get("type") == "required_reviewers"
+        for reviewer in rule.get("reviewers", [])
+        if reviewer.get("type") == "Team"
+    }
+
+# ----------------- Environment Reconciler ----------------- #
+class EnvironmentReconciler:
+    """
+    Reconciles environment reviewer teams per repository.
+
+    Rules are (selector, team) pairs: a string selector names one environment,
+    which is created if it is missing; a callable selector matches existing
+    environments by name. Each repository's environments are fetched once and
+    cached, the desired reviewers are compared with the actual ones in memory,
+    and only environments that are missing a team are written. With dry_run the
+    diff is logged and nothing is written. Teams are looked up in org, or in the
+    repository's owner when org is None.
+    """
+
+    def __init__(self, api_key, dry_run=False, api_url=GITHUB_API_URL, org=None):
+        self.api_key = api_key
+        self.dry_run = dry_run
+        self.api_url = api_url
+        self.org = org
+        self.headers = {"Authorization": f"Bearer {api_key}", "Accept": "application/vnd.github+json"}
+        self._lock = threading.Lock()
+        self._environments = {}  # repo -> {environment name: environment}
+        self._repo_locks = {}
+        self.repos_fetched = 0
+        self.writes = 0
+        self.unchanged = 0
+        self.naive_calls = 0
+
+    def _repo_lock(self, repo):
+        with self._lock:
+            return self._repo_locks.setdefault(repo, threading.Lock())
+
+    def _team_index(self, repo):
+        return teamindex.get_index(self.org or repo.split("/")[0], self.api_key)
+
+    def environments(self, repo):
+        """Return {name: environment} for repo, fetched (all pages) once per run."""
+        with self._lock:
+            if repo in self._environments:
+                return self._environments[repo]
+        url = f"{self.api_url}/repos/{repo}/environments"
+        try:
+            environments = {env["name"]: env for env in ghclient.paginate(url, key="environments", headers=self.headers)}
+        except requests.exceptions.HTTPError as e:
+            if e.response is None or e.response.status_code != 404:
+                raise
+            environments = {}
+        with self._lock:
+            self._environments[repo] = environments
+            self.repos_fetched += 1
+        return environments
+
+    def plan(self, repo, rules):
+        """Compare desired and actual reviewers for repo and return the needed EnvChanges."""
+        index = self._team_index(repo)
+        actual = self.environments(repo)
+        desired = {}
+        for selector, team in rules:
+            names = [name for name in actual if selector(name)] if callable(selector) else [selector]
+            for name in names:
+                desired.setdefault(name, set()).add(index.find(team) or team)
+            # What a per-row script spends: list the environments, then read and write each match.
+            with self._lock:
+                self.naive_calls += 1 + 2 * len(names)
+
+        changes = []
+        for name in sorted(desired):
+            current = actual.get(name)
+            missing = desired[name] - (reviewer_teams(current) if current else set())
+            if current is None or missing:
+                changes.append(EnvChange(repo, name, current is None, sorted(missing)))
+        with self._lock:
+            self.unchanged += len(desired) - len(changes)
+        return changes
+
+    def apply(self, change):
+        """Write one environment, keeping its existing reviewers and protection settings."""
+        index = self._team_index(change.repo)
+        current = self.environments(change.repo).get(change.environment, {})
+        payload = {"reviewers": []}
+        for rule in current.get("protection_rules", []):
+            if rule.get("type") == "required_reviewers":
+                payload["reviewers"] = [{"type": r["type"], "id": r["reviewer"]["id"]} for r in rule.get("reviewers", [])]
+                if "prevent_self_review" in rule:
+                    payload["prevent_self_review"] = rule["prevent_self_review"]
+            elif rule.get("type") == "wait_timer":
+                payload["wait_timer"] = rule.get("wait_timer", 0)
+        if "deployment_branch_policy" in current:
+            payload["deployment_branch_policy"] = current["deployment_branch_policy"]
+        for team in change.add_teams:
+            team_id = index.team_id(team)
+            if team_id is None:
+                raise ValueError(f"Team '{team}' not found in {index.org}")
+            payload["reviewers"].append({"type": "Team", "id": team_id})
+
+        url = f"{self.api_url}/repos/{change.repo}/environments/{change.environment}"
+        response = ghclient.put(url, json=payload, headers=self.headers)
+        response.raise_for_status()
+        with self._lock:
+            self._environments[change.repo][change.environment] = response.json()
+            self.writes += 1
+
+    def describe(self, change):
+        action = "create environment, " if change.create else ""
+        return f"{change.repo} environment '{change.environment}': {action}add reviewers {change.add_teams}"
+
+    def ensure(self, repo, rules):
+        """Reconcile one repository and return the changes that were (or, in dry run, would be) made."""
+        with self._repo_lock(repo):
+            changes = self.plan(repo, rules)
+            for change in changes:
+                if self.dry_run:
+                    logger.info(f"[dry-run] {self.describe(change)}")
+                else:
+                    self.apply(change)
+                    logger.info(f"Reconciled {self.describe(change)}")
+            return changes
+
+    def reconcile(self, rules_by_repo, workers=4):
+        """Reconcile many repositories concurrently; returns {repo: changes or None on error}."""
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            futures = {executor.submit(self.ensure, repo, rules): repo for repo, rules in rules_by_repo.items()}
+            for future in as_completed(futures):
+                repo = futures[future]
+                try:
+                    results[repo] = future.result()
+                except (requests.exceptions.RequestException, ValueError) as e:
+                    logger.error(f"Error reconciling environments for repository '{repo}': {e}")
+                    results[repo] = None
+        return results
+
+    def summary(self):
+        with self._lock:
+            calls = self.repos_fetched + self.writes
+            return {
+                "repos_fetched": self.repos_fetched,
+                "writes": self.writes,
+                "unchanged": self.unchanged,
+                "api_calls": calls,
+                "api_calls_saved": max(0, self.naive_calls - calls),
+                "dry_run": self.dry_run,
+            }
+
+    def log_stats(self):
+        logger.info(f"Environment reconciliation stats: {self.summary()}")
+
+# ----------------- Shared Reconciler ----------------- #
+_reconcilers = {}
+_reconcilers_lock = threading.Lock()
+
+def get_reconciler(api_key, dry_run=False, org=None):
+    """Return the shared EnvironmentReconciler for a token and team organization."""
+    with _reconcilers_lock:
+        if (api_key, dry_run, org) not in _reconcilers:
+            _reconcilers[(api_key, dry_run, org)] = EnvironmentReconciler(api_key, dry_run=dry_run, org=org)
+        return _reconcilers[(api_key, dry_run, org)]
+
+def log_stats():
+    with _reconcilers_lock:
+        reconcilers = list(_reconcilers.values())
+    for reconciler in reconcilers:
+        reconciler.log_stats()
@@ -0,0 +1,167 @@
+import os
+import threading
+import time
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ratelimit import RateLimitScheduler, scheduler
+
+logger = logging.getLogger(__name__)
+
+# ----------------- Pool Settings ----------------- #
+# Defaults can be overridden from the environment or with configure().
+POOL_CONNECTIONS = int(os.getenv("GH_POOL_CONNECTIONS", "10"))  # number of hosts kept in the pool
+POOL_MAXSIZE = int(os.getenv("GH_POOL_MAXSIZE", "32"))  # keep-alive connections per host
+MAX_RETRIES = int(os.getenv("GH_MAX_RETRIES", "3"))
+BACKOFF_FACTOR = float(os.getenv("GH_BACKOFF_FACTOR", "0.5"))
+DEFAULT_TIMEOUT = float(os.getenv("GH_TIMEOUT", "30"))
+THROTTLE_RETRIES = int(os.getenv("GH_THROTTLE_RETRIES", "3"))  # re-sends after a 403/429 rate limit
+
+DEFAULT_HEADERS = {
+    "Accept": "application/vnd.github.v3+json",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+
+# ----------------- Per-process Stats ----------------- #
+class ApiStats:
+    """Thread-safe counters for calls, retries, errors and latency."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.retries = 0
+        self.errors = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.by_method = {}
+
+    def record(self, method, latency, retries=0, error=False):
+        with self._lock:
+            self.calls += 1
+            self.retries += retries
+            self.errors += int(error)
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            self.by_method[method] = self.by_method.get(method, 0) + 1
+
+    def summary(self):
+        with self._lock:
+            avg_latency = self.total_latency / self.calls if self.calls else 0.0
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "errors": self.errors,
+                "avg_latency_ms": round(avg_latency * 1000, 1),
+                "max_latency_ms": round(self.max_latency * 1000, 1),
+                "by_method": dict(self.by_method),
+            }
+
+stats = ApiStats()
+
+# ----------------- Shared Session ----------------- #
+_session = None
+_session_lock = threading.Lock()
+
+def _build_session(pool_connections, pool_maxsize, max_retries, backoff_factor):
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=[500, 502, 503, 504],
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+def configure(pool_connections=None, pool_maxsize=None, max_retries=None, backoff_factor=None):
+    """(Re)create the shared session with the given pool sizes and retry policy."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = _build_session(
+            pool_connections or POOL_CONNECTIONS,
+            pool_maxsize or POOL_MAXSIZE,
+            MAX_RETRIES if max_retries is None else max_retries,
+            BACKOFF_FACTOR if backoff_factor is None else backoff_factor,
+        )
+        return _session
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _build_session(POOL_CONNECTIONS, POOL_MAXSIZE, MAX_RETRIES, BACKOFF_FACTOR)
+        return _session
+
+# ----------------- Request Helpers ----------------- #
+def request(method, url, **kwargs):
+    """
+    Send a request over the pooled session and record latency/retries.
+    Requests are paced by the rate-limit scheduler and re-sent after the
+    advertised wait when GitHub answers with a primary or secondary limit.
+    Returns the requests.Response, so callers keep using status_code,
+    raise_for_status() and json() as with bare requests calls.
+    """
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    key = RateLimitScheduler.key_for(url, kwargs.get("headers") or get_session().headers)
+    for _ in range(THROTTLE_RETRIES + 1):
+        scheduler.acquire(key)
+        start = time.monotonic()
+        try:
+            response = get_session().request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            stats.record(method, time.monotonic() - start, error=True)
+            raise
+        retry_state = getattr(response.raw, "retries", None)
+        retries = len(retry_state.history) if retry_state is not None else 0
+        stats.record(method, time.monotonic() - start, retries=retries, error=response.status_code >= 400)
+        if scheduler.observe(key, response) is None:
+            break
+    return response
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+def put(url, **kwargs):
+    return request("PUT", url, **kwargs)
+
+def patch(url, **kwargs):
+    return request("PATCH", url, **kwargs)
+
+def delete(url, **kwargs):
+    return request("DELETE", url, **kwargs)
+
+def paginate(url, key=None, **kwargs):
+    """
+    Yield the items of a paginated list endpoint, following the Link: rel="next"
+    headers. key names the list for endpoints that wrap it in an object
+    (e.g. {"total_count": ..., "environments": [...]}).
+    Raises requests.HTTPError on a failed page.
+    """
+    params = dict(kwargs.pop("params", None) or {})
+    params.setdefault("per_page", 100)
+    while url:
+        response = get(url, params=params, **kwargs)
+        response.raise_for_status()
+        page = response.json()
+        yield from (page.get(key, []) if key else page)
+        url = response.links.get("next", {}).get("url")
+        params = None  # the next link already carries the query string
+
+def log_stats():
+    logger.info(f"GitHub API stats: {stats.summary()}")
+    logger.info(f"Rate-limit scheduler stats: {scheduler.summary()}")
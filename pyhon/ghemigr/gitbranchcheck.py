@@ -1,44 +1,35 @@
-import subprocess
-
-def run_command(command):
-    """Runs a command and returns the output."""
-    result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-    if result.returncode != 0:
-        raise Exception(f"Command failed: {result.stderr}")
-    return result.stdout.strip()
+from branchcheck import DEFAULT_WORKERS, remote_heads
+from branchcreate import create_branch, create_branches
 
 def branch_exists(remote_url, branch_name):
     """Checks if a branch already exists in the remote repository."""
     try:
-        branches = run_command(['git', 'ls-remote', '--heads', remote_url])
-        return f"refs/heads/{branch_name}" in branches
+        # Exact match against the parsed refs; use branches_exist() for many (repo, branch) pairs
+        return branch_name in remote_heads(remote_url, [branch_name])
     except Exception as e:
         print(f"Error checking branches: {e}")
         return False
 
-def create_and_push_branch(remote_url, new_branch):
-    """Clones repo, creates a new branch, and pushes it to the remote repository."""
-    try:
-        # Clone the repository
-        run_command(['git', 'clone', remote_url])
-        repo_name = remote_url.split('/')[-1].replace('.git', '')
-        
-        # Navigate into the repository folder
-        subprocess.run(['cd', repo_name], shell=True)
-
-        # Check out the default branch (e.g., main)
-        run_command(['git', 'checkout', 'main'])
+def create_and_push_branch(remote_url, new_branch, base_branch='main', mode='push'):
+    """Creates new_branch off the remote base_branch without cloning the repository."""
+    # One ls-remote resolves the base sha and the existence check; the branch is then
+    # created with a ref-only push (mode='push') or one git refs API call (mode='api', $GITHUB_TOKEN).
+    result = create_branch(remote_url, new_branch, base_branch, mode)
+    if result.status == 'exists':
+        print(f"Branch '{new_branch}' already exists. Aborting.")
+    elif result.status == 'created':
+        print(f"Branch '{new_branch}' created and pushed successfully.")
+    else:
+        print(f"Error during branch creation: {result.detail}")
+    return result
 
-        # Check if branch already exists
-        if branch_exists(remote_url, new_branch):
-            print(f"Branch '{new_branch}' already exists. Aborting.")
-        else:
-            # Create and push the new branch
-            run_command(['git', 'checkout', '-b', new_branch])
-            run_command(['git', 'push', '--set-upstream', 'origin', new_branch])
-            print(f"Branch '{new_branch}' created and pushed successfully.")
-    except Exception as e:
-        print(f"Error during branch creation: {e}")
+def create_and_push_branches(remote_urls, new_branch, base_branch='main', mode='push', workers=DEFAULT_WORKERS):
+    """Creates new_branch on many repositories in parallel."""
+    results = []
+    for result in create_branches(remote_urls, new_branch, base_branch, mode, workers):
+        print(f"{result.remote_url}: {result.status}")
+        results.append(result)
+    return results
 
 # Example usage
 remote_url = 'git@github.com:user/repo.git'
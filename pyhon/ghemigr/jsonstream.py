@@ -0,0 +1,86 @@
+import codecs
+import json
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_DELIMITERS = _WHITESPACE + ",]"
+
+def iter_json_array(chunks, tee=None):
+    """
+    Incrementally parse a top-level JSON array and yield its elements as soon
+    as each one is complete, so processing can start before the download ends.
+
+    chunks is any iterable of bytes (e.g. response.iter_content()); when tee is
+    a binary file object every raw chunk is also written to it unchanged.
+    Only the current, not yet complete element is buffered.
+    """
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    pos = 0
+    started = False
+    finished = False
+    expect_element = True  # after '[' or ','; after an element only ',' or ']' may follow
+    after_comma = False
+
+    def feed(chunk):
+        if tee is not None:
+            tee.write(chunk)
+        return text_decoder.decode(chunk)
+
+    chunk_iter = iter(chunks)
+    exhausted = False
+    while not finished:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+
+        if pos < len(buffer):
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError(f"Expected a JSON array, got {buffer[pos]!r}")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                if after_comma:
+                    raise ValueError("Trailing ',' in JSON array")
+                finished = True
+                break
+            if not expect_element:
+                if buffer[pos] != ",":
+                    raise ValueError(f"Expected ',' or ']' in JSON array, got {buffer[pos]!r}")
+                expect_element = after_comma = True
+                pos += 1
+                continue
+            if buffer[pos] == ",":
+                raise ValueError("Unexpected ',' in JSON array")
+            try:
+                element, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                element, end = None, None
+            # A scalar is only complete once a delimiter follows it: "12" may be the start of
+            # "123", and raw_decode("4.") returns 4 although the next chunk may hold ".5".
+            complete = end is not None and (
+                isinstance(element, (dict, list)) or (end < len(buffer) and buffer[end] in _DELIMITERS)
+            )
+            if complete or (end is not None and exhausted):
+                yield element
+                expect_element = after_comma = False
+                buffer, pos = buffer[end:], 0
+                continue
+            if exhausted:
+                raise ValueError("Truncated JSON array in stream")
+
+        if exhausted:
+            raise ValueError("Truncated JSON array in stream")
+        try:
+            chunk = next(chunk_iter)
+        except StopIteration:
+            exhausted = True
+            buffer += text_decoder.decode(b"", final=True)
+            continue
+        buffer = buffer[pos:] + feed(chunk)
+        pos = 0
+
+    # Drain the rest of the stream so the tee holds the complete payload.
+    for chunk in chunk_iter:
+        feed(chunk)
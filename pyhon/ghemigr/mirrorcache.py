@@ -0,0 +1,162 @@
+import os
+import time
+import fcntl
+import shutil
+import logging
+import subprocess
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# ----------------- Cache Settings ----------------- #
+MIRROR_DIR = os.getenv("GHEMIGR_MIRROR_DIR", os.path.expanduser("~/.cache/ghemigr/mirrors"))
+DISK_BUDGET_GB = float(os.getenv("GHEMIGR_MIRROR_BUDGET_GB", "20"))
+LAST_USED_MARKER = "ghemigr-last-used"
+
+def run_git(args, cwd=None):
+    subprocess.check_call(["git"] + args, cwd=cwd)
+
+def dir_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+# ----------------- Mirror Cache ----------------- #
+class MirrorCache:
+    """
+    Local bare mirrors keyed by repository ("org/repo").
+
+    The first request for a repository fetches its branches and tags into a
+    bare mirror; later requests only fetch what changed. Workspaces are created with a
+    local clone from the mirror, which hard-links the object files instead of
+    transferring them, so a workspace stays valid even if its mirror is evicted
+    later (unlike --shared/--reference clones that depend on the mirror's objects).
+    Each mirror is guarded by its own lock file, so threads and separate
+    processes can share the cache directory. Mirrors are only read under a
+    lease() that holds that lock, and least recently used mirrors that are not
+    leased are removed once the cache grows past the disk budget.
+    """
+
+    def __init__(self, root=MIRROR_DIR, budget_gb=DISK_BUDGET_GB):
+        self.root = root
+        self.budget_bytes = int(budget_gb * 1024 ** 3)
+        os.makedirs(self.root, exist_ok=True)
+
+    def mirror_path(self, repo):
+        return os.path.join(self.root, repo.replace("/", "__") + ".git")
+
+    @staticmethod
+    @contextmanager
+    def _path_lock(mirror, blocking=True):
+        """Exclusive lock on one mirror path; yields False if non-blocking and busy."""
+        lock_file = open(mirror + ".lock", "w")
+        try:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield False
+                return
+            yield True
+        finally:
+            lock_file.close()
+
+    def repo_lock(self, repo, blocking=True):
+        """Exclusive per-repository lock; yields False if non-blocking and busy."""
+        return self._path_lock(self.mirror_path(repo), blocking)
+
+    def _refresh(self, repo, repo_url, mirror):
+        """Create or incrementally fetch mirror; the caller holds the repo lock."""
+        created = not os.path.isdir(mirror)
+        if not created:
+            logger.info(f"Fetching updates into mirror {mirror}")
+        else:
+            logger.info(f"Creating mirror of {repo_url} at {mirror}")
+            run_git(["init", "--bare", "--quiet", mirror])
+            run_git(["remote", "add", "origin", repo_url], cwd=mirror)
+            # Branches and tags only; GitHub's refs/pull/* would bloat the mirror.
+            run_git(["config", "--replace-all", "remote.origin.fetch", "+refs/heads/*:refs/heads/*"], cwd=mirror)
+            run_git(["config", "--add", "remote.origin.fetch", "+refs/tags/*:refs/tags/*"], cwd=mirror)
+            # Objects are hard-linked into workspaces; never let git gc repack under them.
+            run_git(["config", "gc.auto", "0"], cwd=mirror)
+        run_git(["fetch", "--prune", "--quiet", "origin"], cwd=mirror)
+        if created:
+            self._sync_head(mirror)
+        with open(os.path.join(mirror, LAST_USED_MARKER), "w") as f:
+            f.write(str(time.time()))
+
+    @contextmanager
+    def lease(self, repo, repo_url):
+        """
+        Refresh the mirror for repo and yield its path while holding the repo lock,
+        so the mirror can be read (cloned, pushed from) without being evicted or
+        fetched into by another worker until the with-block ends.
+        """
+        mirror = self.mirror_path(repo)
+        with self.repo_lock(repo):
+            self._refresh(repo, repo_url, mirror)
+            self.evict(keep=mirror)
+            yield mirror
+
+    def update(self, repo, repo_url):
+        """
+        Create or incrementally refresh the mirror for repo and return its path.
+        The mirror is not leased once this returns; use lease() to read from it.
+        """
+        with self.lease(repo, repo_url) as mirror:
+            return mirror
+
+    @staticmethod
+    def _sync_head(mirror):
+        """Point the mirror's HEAD at the remote default branch so clones check it out."""
+        output = subprocess.check_output(["git", "ls-remote", "--symref", "origin", "HEAD"], cwd=mirror, text=True)
+        for line in output.splitlines():
+            if line.startswith("ref: ") and line.endswith("\tHEAD"):
+                run_git(["symbolic-ref", "HEAD", line[len("ref: "):-len("\tHEAD")]], cwd=mirror)
+                break
+
+    def clone(self, repo, repo_url, clone_path, branch=None):
+        """Create a working copy of repo at clone_path from the (refreshed) mirror."""
+        args = ["clone", "--local"]
+        if branch:
+            args += ["--branch", branch]
+        # One lease from the fetch through the clone, so the mirror cannot be evicted in between.
+        with self.lease(repo, repo_url) as mirror:
+            run_git(args + [mirror, clone_path])
+        # Point the workspace at the real remote so pushes and PRs target GitHub.
+        run_git(["remote", "set-url", "origin", repo_url], cwd=clone_path)
+        logger.info(f"Created workspace {clone_path} from mirror {mirror}")
+        return clone_path
+
+    def evict(self, keep=None):
+        """
+        Remove least recently used mirrors until the cache fits the disk budget.
+        keep is a mirror path that is never removed; mirrors whose lock is held
+        (leased by this or another process) are skipped as well.
+        """
+        mirrors = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if not name.endswith(".git") or not os.path.isdir(path):
+                continue
+            marker = os.path.join(path, LAST_USED_MARKER)
+            last_used = os.path.getmtime(marker) if os.path.exists(marker) else 0
+            mirrors.append((last_used, path, dir_size(path)))
+
+        keep = os.path.abspath(keep) if keep else None
+        total = sum(size for _, _, size in mirrors)
+        for _, path, size in sorted(mirrors):
+            if total <= self.budget_bytes:
+                break
+            if os.path.abspath(path) == keep:
+                continue
+            with self._path_lock(path, blocking=False) as acquired:
+                if not acquired:
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+            total -= size
+            logger.info(f"Evicted mirror {path} ({size // 1024 ** 2} MB)")
@@ -1,13 +1,26 @@
+import argparse
 import csv
+import logging
+
+import requests
+
+import ghclient
+import envreconcile
 
 # Function 4: Manage GitHub environments and add reviewers based on the CSV report
-def manage_github_environments_from_csv(csv_file, github_token):
+def manage_github_environments_from_csv(csv_file, github_token, dry_run=False, workers=4):
     """
     Manage GitHub environments and add a GitHub team as a reviewer for environments with 'e3' in their name,
     if not already added, based on data from a CSV report file.
 
+    Rows are grouped by repository, so each repository's environments are fetched once, and
+    repositories are reconciled concurrently. Only environments missing a team are written.
+
     :param csv_file: Path to the CSV report file.
     :param github_token: GitHub API token for authentication.
+    :param dry_run: Only log the reviewer changes that would be made.
+    :param workers: Number of repositories reconciled in parallel.
+    :return: {repository: list of EnvChange, or None on error}
     """
     try:
         # Read the CSV file
@@ -15,59 +28,37 @@ def manage_github_environments_from_csv(csv_file, github_token):
             reader = csv.DictReader(f)
             rows = [row for row in reader]
 
+        # Group rows by repository: one rule per team, matching environments with 'e3' in their name
+        rules_by_repo = {}
         for row in rows:
             repo = row['repository']
             team_name = row['teamName']
-
             logging.info(f"Processing repository: {repo} | Team: {team_name}")
+            rules_by_repo.setdefault(repo, []).append((lambda env_name: "e3" in env_name, team_name))
 
-            api_url = f"https://api.github.com/repos/{repo}/environments"
-            headers = {
-                "Authorization": f"Bearer {github_token}",
-                "Accept": "application/vnd.github+json"
-            }
-
-            # Fetch all environments
-            response = requests.get(api_url, headers=headers)
-            response.raise_for_status()
-            environments = response.json().get("environments", [])
-
-            # Filter environments containing 'e3' in their name
-            target_environments = [env["name"] for env in environments if "e3" in env["name"]]
-
-            if not target_environments:
-                logging.info(f"No environments found with 'e3' in the name for repository '{repo}'.")
-                continue
-
-            logging.info(f"Environments to update in repository '{repo}': {target_environments}")
-
-            for env_name in target_environments:
-                env_url = f"{api_url}/{env_name}/protection/restrictions/teams"
-
-                # Check existing reviewers for the environment
-                response = requests.get(env_url, headers=headers)
-                response.raise_for_status()
-                existing_teams = [team["slug"] for team in response.json()]
-
-                if team_name in existing_teams:
-                    logging.info(f"Team '{team_name}' is already a reviewer for environment '{env_name}' in repository '{repo}'.")
-                    continue
-
-                # Add the team as a reviewer
-                payload = {"teams": [team_name]}
-                response = requests.post(env_url, headers=headers, json=payload)
-
-                if response.status_code == 201 or response.status_code == 200:
-                    logging.info(f"Successfully added team '{team_name}' as a reviewer for environment '{env_name}' in repository '{repo}'.")
-                else:
-                    logging.error(
-                        f"Failed to add team '{team_name}' as a reviewer for environment '{env_name}' in repository '{repo}'. "
-                        f"Status code: {response.status_code}, Response: {response.text}"
-                    )
+        reconciler = envreconcile.EnvironmentReconciler(github_token, dry_run=dry_run)
+        results = reconciler.reconcile(rules_by_repo, workers=workers)
+        for repo, changes in results.items():
+            if changes == []:
+                logging.info(f"No reviewer changes needed for environments with 'e3' in the name in repository '{repo}'.")
+        reconciler.log_stats()
+        return results
 
     except FileNotFoundError:
         logging.error(f"Error: The CSV file '{csv_file}' was not found.")
     except csv.Error as e:
         logging.error(f"Error reading CSV file '{csv_file}': {e}")
     except requests.exceptions.RequestException as e:
-        logging.error(f"Error managing GitHub environments: {e}")
\ No newline at end of file
+        logging.error(f"Error managing GitHub environments: {e}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Add CSV report teams as reviewers of 'e3' environments")
+    parser.add_argument('--csv-file', required=True, help="CSV report with 'repository' and 'teamName' columns")
+    parser.add_argument('--api-token', required=True, help="GitHub API token for authentication")
+    parser.add_argument('--dry-run', action='store_true', help="Only log the reviewer changes that would be made")
+    parser.add_argument('--workers', type=int, default=4, help="Repositories reconciled in parallel (default: 4)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    manage_github_environments_from_csv(args.csv_file, args.api_token, dry_run=args.dry_run, workers=args.workers)
+    ghclient.log_stats()
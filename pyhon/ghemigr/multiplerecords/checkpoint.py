@@ -0,0 +1,83 @@
+import sqlite3
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+STAGES = ["branch", "clone", "files", "team", "environments", "commit", "pr"]
+
+def record_key(record):
+    """Identity of a record across runs: repository, base branch and folderName."""
+    return f"{record['repository']}|{record.get('branch', 'main')}|{record.get('folderName', 'default')}"
+
+# ----------------- Checkpoint Journal ----------------- #
+class CheckpointJournal:
+    """
+    Durable per-run journal of completed stages, stored in SQLite.
+
+    Each (record key, stage) row holds the stage's result (branch name, clone
+    path, team slug, PR URL, ...), committed as soon as the stage finishes, so
+    a rerun with --resume can skip everything a killed run already did.
+    A journal that already holds stages is only reused with resume, or wiped
+    with fresh; otherwise opening it raises RuntimeError.
+    """
+
+    def __init__(self, path, resume=False, fresh=False):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS stages ("
+            " record_key TEXT NOT NULL, stage TEXT NOT NULL, value TEXT, completed_at REAL,"
+            " PRIMARY KEY (record_key, stage))"
+        )
+        count = self._conn.execute("SELECT COUNT(*) FROM stages").fetchone()[0]
+        if resume:
+            logger.info(f"Resuming from checkpoint journal {path} ({count} completed stages).")
+        elif count and not fresh:
+            self._conn.close()
+            raise RuntimeError(f"Checkpoint journal {path} already holds {count} completed stages")
+        else:
+            self._conn.execute("DELETE FROM stages")
+
+    def get(self, key, stage):
+        """Return (True, value) if the stage is recorded as complete, else (False, None)."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM stages WHERE record_key = ? AND stage = ?", (key, stage)
+            ).fetchone()
+        return (True, row[0]) if row else (False, None)
+
+    def mark(self, key, stage, value=""):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO stages (record_key, stage, value, completed_at) VALUES (?, ?, ?, ?)",
+                (key, stage, None if value is None else str(value), time.time()),
+            )
+
+    def clear(self, key, *stages):
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM stages WHERE record_key = ? AND stage = ?", [(key, stage) for stage in stages]
+            )
+
+    def run_stage(self, key, stage, func):
+        """
+        Return the recorded value if stage is already complete for key; otherwise
+        run func() and record its result unless it returned None (failure).
+        """
+        done, value = self.get(key, stage)
+        if done:
+            logger.info(f"Skipping stage '{stage}' for {key}: already completed.")
+            return value
+        value = func()
+        if value is not None:
+            self.mark(key, stage, value)
+        return value
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -6,11 +6,12 @@ import time
 import subprocess
 import requests
 import logging
-import csv
 import json
 
+from reportsink import CsvReportSink
+
 # Configure logger to write to both a file and print in terminal
-logger = logging.getLogger(__name__)
+logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 file_handler = logging.FileHandler('execution.log')
 file_handler.setLevel(logging.INFO)
@@ -143,35 +144,8 @@ def generate_unique_branch_name(base_branch_name="main"):
     unique_branch_name = f"{base_branch_name}-pr-{timestamp}-{random_string}"
     return unique_branch_name
 
-# Function to update CSV with pull request URL
-def update_csv_report(csv_file, repo, branch, folder_name, pr_url):
-    try:
-        rows = []
-        with open(csv_file, mode='r', newline='') as f:
-            reader = csv.reader(f)
-            rows = list(reader)
-        
-        updated = False
-        for row in rows:
-            if row[0] == repo and row[1] == branch and row[2] == folder_name:
-                row.append(pr_url)
-                updated = True
-                break
-        
-        if not updated:
-            rows.append([repo, branch, folder_name, '', '', pr_url])
-        
-        with open(csv_file, mode='w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerows(rows)
-        
-        logger.info(f"CSV report updated with PR URL for {repo} and {branch}")
-    
-    except Exception as e:
-        logger.error(f"Error updating CSV report: {e}")
-
 # Function to process each record and create pull request
-def process_record_and_create_pr(record, api_key, org, csv_file):
+def process_record_and_create_pr(record, api_key, org, report):
     try:
         workspace_name = generate_random_workspace_name()
         logger.info(f"Processing record for repo: {record['repository']}, branch: {record['branch']}, folder: {record.get('folderName', 'default')}")
@@ -202,7 +176,11 @@ def process_record_and_create_pr(record, api_key, org, csv_file):
         )
         
         if pr_url:
-            update_csv_report(csv_file, record['repository'], record['branch'], record['folderName'], pr_url)
+            existing_row = report.get(record['repository'], record['branch'], record['folderName'])
+            if existing_row:
+                report.upsert(*existing_row, pr_url)
+            else:
+                report.upsert(record['repository'], record['branch'], record['folderName'], '', '', pr_url)
         
     except Exception as e:
         logger.error(f"Error processing record {record['repository']} with branch {record['branch']}: {e}")
@@ -223,6 +201,7 @@ if __name__ == '__main__':
         logger.error(f"Error decoding input payload: {e}")
         exit(1)
 
-    # Process each record
-    for record in json_data:
-        process_record_and_create_pr(record, api_key, org, csv_file)
\ No newline at end of file
+    # Process each record; the report is written once when the sink is closed
+    with CsvReportSink(csv_file, header=None) as report:
+        for record in json_data:
+            process_record_and_create_pr(record, api_key, org, report)
\ No newline at end of file
@@ -1,16 +1,22 @@
 import argparse
 import os
+import sys
 import random
 import string
 import time
 import subprocess
 import requests
 import logging
-import csv
 import json
 
+from reportsink import CsvReportSink
+
+# Shared modules live one level up in pyhon/ghemigr
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from jsonstream import iter_json_array
+
 # ----------------- Logger Setup ----------------- #
-logger = logging.getLogger(__name__)
+logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 file_handler = logging.FileHandler('execution.log')
 file_handler.setLevel(logging.INFO)
@@ -30,6 +36,7 @@ def parse_arguments():
     parser.add_argument('--json-output-file', required=True, help="Path to write the returned JSON data")
     parser.add_argument('--report-file', required=True, help="Path to CSV report file")
     parser.add_argument('--api-token', required=True, help="GitHub API token for authentication")
+    parser.add_argument('--stream', action='store_true', help="Parse the API response incrementally and start processing records as they arrive")
     return parser.parse_args()
 
 # ----------------- API Call Function ----------------- #
@@ -46,6 +53,30 @@ def fetch_json_data(api_url, input_payload):
         logger.error(f"Error fetching JSON data: {e}")
         return None
 
+def stream_json_data(api_url, input_payload, json_output_file):
+    """
+    Yield records from the API response as they arrive instead of loading the whole payload.
+    The raw response bytes are written to json_output_file while streaming.
+    A failed or malformed stream is logged and re-raised, so the run cannot pass for complete.
+    """
+    try:
+        headers = {'Content-Type': 'application/json'}
+        logger.info(f"Streaming API: {api_url} with payload: {input_payload}")
+        with requests.post(api_url, json=input_payload, headers=headers, stream=True) as response:
+            response.raise_for_status()
+            with open(json_output_file, "wb") as raw_file:
+                count = 0
+                for record in iter_json_array(response.iter_content(chunk_size=64 * 1024), tee=raw_file):
+                    count += 1
+                    yield record
+        logger.info(f"API stream complete: {count} records.")
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Error streaming JSON data: {e}")
+        raise
+    except ValueError as e:
+        logger.error(f"Error parsing streamed JSON data: {e}")
+        raise
+
 # ----------------- Utility Functions ----------------- #
 def generate_random_workspace_name():
     random_string = ''.join(random.choices(string.ascii_letters + string.digits, k=8))
@@ -148,35 +179,8 @@ def create_pull_request(repo, pr_title, pr_description, base_branch, head_branch
         logger.error(f"Error creating pull request for repo {repo}: {e}")
         return None
 
-# ----------------- CSV Report Handling ----------------- #
-def update_csv_report(csv_file, repo, branch, folder_name, team_name, members, pr_url):
-    try:
-        rows = []
-        if os.path.exists(csv_file):
-            with open(csv_file, mode='r', newline='') as f:
-                reader = csv.reader(f)
-                rows = list(reader)
-        else:
-            rows.append(["repository", "branch", "folderName", "teamName", "members", "prUrl"])
-        updated = False
-        for row in rows:
-            if row[0] == repo and row[1] == branch and row[2] == folder_name:
-                row[3] = team_name
-                row[4] = members
-                row[5] = pr_url
-                updated = True
-                break
-        if not updated:
-            rows.append([repo, branch, folder_name, team_name, members, pr_url])
-        with open(csv_file, mode='w', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerows(rows)
-        logger.info(f"CSV report updated with PR URL for {repo} and {branch}")
-    except Exception as e:
-        logger.error(f"Error updating CSV report: {e}")
-
 # ----------------- Main Processing Function ----------------- #
-def process_record_and_create_pr(record, api_key, org, csv_file):
+def process_record_and_create_pr(record, api_key, org, report):
     try:
         workspace_name = generate_random_workspace_name()
         logger.info(f"Processing record for repo: {record['repository']}, branch: {record['branch']}, folder: {record.get('folderName', 'default')}")
@@ -218,7 +222,7 @@ def process_record_and_create_pr(record, api_key, org, csv_file):
             api_key
         )
         
-        update_csv_report(csv_file, record['repository'], record['branch'], record['folderName'], team_name, members_str, pr_url)
+        report.upsert(record['repository'], record['branch'], record['folderName'], team_name, members_str, pr_url)
         
     except Exception as e:
         logger.error(f"Error processing record {record['repository']} with branch {record['branch']}: {e}")
@@ -239,15 +243,25 @@ if __name__ == '__main__':
         logger.error(f"Error decoding input payload: {e}")
         exit(1)
     
-    json_data = fetch_json_data(args.api_url, input_payload)
-    if json_data is None:
-        logger.error("No JSON data returned from API. Exiting.")
-        exit(1)
-    
-    # Write the JSON output file for record keeping
-    with open(args.json_output_file, 'w') as f:
-        json.dump(json_data, f, indent=4)
+    if args.stream:
+        # Records are yielded while downloading; raw bytes are teed to the output file
+        json_data = stream_json_data(args.api_url, input_payload, args.json_output_file)
+    else:
+        json_data = fetch_json_data(args.api_url, input_payload)
+        if json_data is None:
+            logger.error("No JSON data returned from API. Exiting.")
+            exit(1)
+        
+        # Write the JSON output file for record keeping
+        with open(args.json_output_file, 'w') as f:
+            json.dump(json_data, f, indent=4)
     
     # Process each record in the JSON data (expected to be a list)
-    for record in json_data:
-        process_record_and_create_pr(record, api_key, org, csv_file)
\ No newline at end of file
+    try:
+        with CsvReportSink(csv_file) as report:
+            for record in json_data:
+                process_record_and_create_pr(record, api_key, org, report)
+    except (requests.exceptions.RequestException, ValueError):
+        # The stream broke mid-way; records already processed are in the report
+        logger.error("Input stream failed; remaining records were not processed.")
+        exit(1)
\ No newline at end of file
@@ -1,16 +1,30 @@
 import argparse
 import os
+import sys
 import random
 import string
 import time
 import subprocess
 import requests
 import logging
-import csv
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+
+from reportsink import CsvReportSink
+from checkpoint import CheckpointJournal, record_key
+from pipeline import StagePipeline
+
+# Shared modules live one level up in pyhon/ghemigr
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ghclient
+import teamindex
+import envreconcile
+from jsonstream import iter_json_array
+from mirrorcache import MirrorCache
 
 # ----------------- Logger Setup ----------------- #
-logger = logging.getLogger(__name__)
+logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 file_handler = logging.FileHandler('execution.log')
 file_handler.setLevel(logging.INFO)
@@ -30,6 +44,23 @@ def parse_arguments():
     parser.add_argument('--json-output-file', required=True, help="Path to write the returned JSON data")
     parser.add_argument('--report-file', required=True, help="Path to CSV report file")
     parser.add_argument('--api-token', required=True, help="GitHub API token for authentication")
+    parser.add_argument('--stream', action='store_true', help="Parse the API response incrementally and start processing records as they arrive")
+    parser.add_argument('--workers', type=int, default=1, help="Number of records to process in parallel (default: 1, serial)")
+    parser.add_argument('--pipeline', action='store_true', help="Run clone/files/push/API as pipelined stages with separate worker pools instead of --workers")
+    parser.add_argument('--git-workers', type=int, default=4, help="Pipeline: workers for the git clone and push stages (default: 4)")
+    parser.add_argument('--fs-workers', type=int, default=1, help="Pipeline: workers for the file-writing stage (default: 1)")
+    parser.add_argument('--api-workers', type=int, default=4, help="Pipeline: workers for the GitHub API stage (default: 4)")
+    parser.add_argument('--org-concurrency', type=int, default=4, help="Maximum concurrent GitHub API calls per organization (default: 4)")
+    parser.add_argument('--journal-file', default=None, help="Checkpoint journal (SQLite) of completed stages (default: <report-file>.checkpoint.db)")
+    journal_mode = parser.add_mutually_exclusive_group()
+    journal_mode.add_argument('--resume', action='store_true', help="Resume from the checkpoint journal, skipping stages a previous run completed")
+    journal_mode.add_argument('--fresh', action='store_true', help="Discard an existing checkpoint journal and start over")
+    parser.add_argument('--backend', choices=["git", "api"], default="git", help="How files are committed: git (clone, commit, push) or api (GitHub Git Data API, no checkout) (default: git)")
+    parser.add_argument('--clone-mode', choices=CLONE_MODES, default="full", help="How much of each repository to fetch: full, shallow (depth 1), sparse (depth 1, blobless, only .github/workflows and folderName) or blobless (default: full)")
+    parser.add_argument('--mirror-dir', default=None, help="Enable the shared bare-mirror cache in this directory (default: disabled)")
+    parser.add_argument('--mirror-budget-gb', type=float, default=20, help="Disk budget for the mirror cache before LRU eviction (default: 20)")
+    parser.add_argument('--team-cache-ttl', type=float, default=teamindex.TEAM_CACHE_TTL, help="Seconds the org team/membership index is cached before it is reloaded (default: 900)")
+    parser.add_argument('--pool-size', type=int, default=None, help="Keep-alive connections kept per host by the shared GitHub session (default: max(32, workers))")
     return parser.parse_args()
 
 # ----------------- API Call Function ----------------- #
@@ -46,6 +77,30 @@ def fetch_json_data(api_url, input_payload):
         logger.error(f"Error fetching JSON data: {e}")
         return None
 
+def stream_json_data(api_url, input_payload, json_output_file):
+    """
+    Yield records from the API response as they arrive instead of loading the whole payload.
+    The raw response bytes are written to json_output_file while streaming.
+    A failed or malformed stream is logged and re-raised, so the run cannot pass for complete.
+    """
+    try:
+        headers = {'Content-Type': 'application/json'}
+        logger.info(f"Streaming API: {api_url} with payload: {input_payload}")
+        with requests.post(api_url, json=input_payload, headers=headers, stream=True) as response:
+            response.raise_for_status()
+            with open(json_output_file, "wb") as raw_file:
+                count = 0
+                for record in iter_json_array(response.iter_content(chunk_size=64 * 1024), tee=raw_file):
+                    count += 1
+                    yield record
+        logger.info(f"API stream complete: {count} records.")
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Error streaming JSON data: {e}")
+        raise
+    except ValueError as e:
+        logger.error(f"Error parsing streamed JSON data: {e}")
+        raise
+
 # ----------------- Utility Functions ----------------- #
 def generate_random_workspace_name():
     random_string = ''.join(random.choices(string.ascii_letters + string.digits, k=8))
@@ -62,18 +117,93 @@ def create_directories(path):
         logger.info(f"Created directory: {path}")
 
 # ----------------- Git Operations ----------------- #
-def clone_repository(repo, clone_path):
+MIRROR_CACHE = None  # set from --mirror-dir
+CLONE_MODES = ["full", "shallow", "sparse", "blobless"]
+CLONE_MODE = "full"  # set from --clone-mode
+CLONE_STATS = []  # (repo, mode, seconds, bytes) per clone
+_clone_stats_lock = threading.Lock()
+
+def git_dir_size(clone_path):
+    """Size of the clone's .git directory, i.e. roughly the bytes fetched from the remote."""
+    total = 0
+    for root, _, files in os.walk(os.path.join(clone_path, ".git")):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+def clone_repository(repo, clone_path, branch=None, sparse_paths=None):
+    """
+    Clone repo into clone_path using CLONE_MODE.
+    sparse mode only materializes sparse_paths (the directories the migration writes to),
+    so only their blobs are downloaded.
+    """
     repo_url = f"git@github.com:{repo}.git"
+    branch_args = ["--branch", branch] if branch else []
     try:
-        if not os.path.exists(clone_path):
+        start = time.monotonic()
+        if not os.path.exists(clone_path) and MIRROR_CACHE:
+            logger.info(f"Cloning repository: {repo_url} to {clone_path} via mirror cache")
+            MIRROR_CACHE.clone(repo, repo_url, clone_path, branch)
+        elif not os.path.exists(clone_path) and CLONE_MODE == "shallow":
+            logger.info(f"Shallow cloning repository: {repo_url} to {clone_path}")
+            subprocess.check_call(["git", "clone", "--depth", "1", "--single-branch"] + branch_args + [repo_url, clone_path])
+        elif not os.path.exists(clone_path) and CLONE_MODE == "blobless":
+            logger.info(f"Blobless cloning repository: {repo_url} to {clone_path}")
+            subprocess.check_call(["git", "clone", "--filter=blob:none"] + branch_args + [repo_url, clone_path])
+        elif not os.path.exists(clone_path) and CLONE_MODE == "sparse":
+            logger.info(f"Sparse cloning repository: {repo_url} to {clone_path} (paths: {sparse_paths})")
+            subprocess.check_call(["git", "clone", "--depth", "1", "--single-branch", "--filter=blob:none", "--sparse"] + branch_args + [repo_url, clone_path])
+            subprocess.check_call(["git", "sparse-checkout", "set"] + list(sparse_paths or []), cwd=clone_path)
+        elif not os.path.exists(clone_path):
             logger.info(f"Cloning repository: {repo_url} to {clone_path}")
-            subprocess.check_call(["git", "clone", repo_url, clone_path])
+            subprocess.check_call(["git", "clone"] + branch_args + [repo_url, clone_path])
         else:
             logger.info(f"Repository already cloned at {clone_path}")
+            return clone_path
+        elapsed = time.monotonic() - start
+        mode = "mirror" if MIRROR_CACHE else CLONE_MODE
+        size = git_dir_size(clone_path)
+        with _clone_stats_lock:
+            CLONE_STATS.append((repo, mode, elapsed, size))
+        logger.info(f"Cloned {repo} in {elapsed:.1f}s ({mode} mode, {size / 1024 ** 2:.1f} MB fetched)")
+        return clone_path
     except subprocess.CalledProcessError as e:
         logger.error(f"Error cloning repository {repo_url}: {e}")
+        return None
+
+def log_clone_stats():
+    with _clone_stats_lock:
+        by_mode = {}
+        for _, mode, elapsed, size in CLONE_STATS:
+            count, total_time, total_size = by_mode.get(mode, (0, 0.0, 0))
+            by_mode[mode] = (count + 1, total_time + elapsed, total_size + size)
+    for mode, (count, total_time, total_size) in by_mode.items():
+        logger.info(f"Clone stats ({mode}): {count} clones, avg {total_time / count:.1f}s, "
+                    f"avg {total_size / count / 1024 ** 2:.1f} MB, total {total_size / 1024 ** 2:.1f} MB")
+
+def commit_and_push_changes(clone_path, head_branch, message):
+    """
+    Commit the written files on head_branch and push it so the PR has a head.
+    Safe to re-run on the same workspace after an interrupted attempt.
+    """
+    subprocess.check_call(["git", "checkout", "-B", head_branch], cwd=clone_path)
+    subprocess.check_call(["git", "add", "--all"], cwd=clone_path)
+    if subprocess.call(["git", "diff", "--cached", "--quiet"], cwd=clone_path) != 0:
+        subprocess.check_call(["git", "commit", "-m", message], cwd=clone_path)
+    subprocess.check_call(["git", "push", "origin", head_branch], cwd=clone_path)
+    logger.info(f"Pushed branch {head_branch} from {clone_path}")
+    return head_branch
 
 # ----------------- YAML File Handling ----------------- #
+def yaml_repo_path(yaml_type, yaml_info):
+    """Repository-relative path (with / separators) that a YAML entry is written to."""
+    if yaml_type.startswith("workflowYaml"):
+        # Always use .github/workflows for workflow YAMLs.
+        return f".github/workflows/{yaml_info['fileName']}"
+    # For other YAML files, use the folderName specified in the YAML info.
+    # The record should supply this via the folderName field.
+    return f"{yaml_info.get('folderName', 'default')}/{yaml_info['fileName']}"
+
 def copy_yaml_files_to_repo(clone_path, yaml_data):
     """
     For each YAML entry, create the target directory (if needed) and create a file
@@ -84,58 +214,52 @@ def copy_yaml_files_to_repo(clone_path, yaml_data):
     try:
         for yaml_type, yaml_list in yaml_data.items():
             for yaml_info in yaml_list:
-                if yaml_type.startswith("workflowYaml"):
-                    # Always use .github/workflows for workflow YAMLs.
-                    target_dir = os.path.join(clone_path, ".github", "workflows")
-                else:
-                    # For other YAML files, use the folderName specified in the YAML info.
-                    # The record should supply this via the folderName field.
-                    target_dir = os.path.join(clone_path, yaml_info.get("folderName", "default"))
-                create_directories(target_dir)
-                file_path = os.path.join(target_dir, yaml_info["fileName"])
+                file_path = os.path.join(clone_path, *yaml_repo_path(yaml_type, yaml_info).split("/"))
+                create_directories(os.path.dirname(file_path))
                 with open(file_path, 'w') as f:
                     f.write(yaml_info["content"])
                 logger.info(f"Created file {file_path} with provided content.")
+        return True
     except Exception as e:
         logger.error(f"Error copying YAML files to {clone_path}: {e}")
+        return None
 
 # ----------------- GitHub API Functions ----------------- #
+ENVIRONMENTS = ["e2", "e3"]  # environments that get the record's team as required reviewer
+
 def create_github_team_and_add_members(org, github_team, api_key):
+    """
+    Reconcile the team against the cached org team index: create the team only if
+    it does not exist and add only the members that are not on it yet.
+    """
     try:
-        url = f"https://api.github.com/orgs/{org}/teams"
-        headers = {'Authorization': f'token {api_key}'}
-        payload = {
-            "name": github_team["teamName"],
-            "description": f"Team {github_team['teamName']} created via API",
-            "privacy": "closed"
-        }
-        response = requests.post(url, json=payload, headers=headers)
-        response.raise_for_status()
-        team_slug = response.json()["slug"]
-        logger.info(f"GitHub team {github_team['teamName']} created with slug {team_slug}.")
-        for member in github_team["members"]:
-            member_url = f"https://api.github.com/orgs/{org}/teams/{team_slug}/memberships/{member}"
-            response = requests.put(member_url, headers=headers)
-            response.raise_for_status()
-            logger.info(f"Added member {member} to team {github_team['teamName']}.")
+        index = teamindex.get_index(org, api_key)
+        team_slug = index.ensure_team(
+            github_team["teamName"],
+            description=f"Team {github_team['teamName']} created via API",
+            privacy="closed",
+        )
+        added = index.ensure_members(team_slug, github_team["members"])
+        logger.info(f"GitHub team {github_team['teamName']} ({team_slug}) reconciled, {len(added)} member(s) added.")
         return team_slug
     except requests.exceptions.RequestException as e:
         logger.error(f"Error creating GitHub team or adding members: {e}")
         return None
 
 def ensure_environments(repo, org, team_slug, api_key):
-    headers = {'Authorization': f'token {api_key}', 'Accept': 'application/vnd.github.v3+json'}
-    for env in ["e2", "e3"]:
-        url = f"https://api.github.com/repos/{org}/{repo}/environments/{env}"
-        payload = {"reviewers": [team_slug]}
-        try:
-            response = requests.put(url, json=payload, headers=headers)
-            if response.status_code in [200, 201]:
-                logger.info(f"Environment '{env}' ensured for repo {repo} with reviewer {team_slug}.")
-            else:
-                logger.error(f"Failed to ensure environment '{env}' for repo {repo}: {response.text}")
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error ensuring environment '{env}' for repo {repo}: {e}")
+    """
+    Make team_slug a required reviewer of the e2/e3 environments. The repo's
+    environments are fetched once per run and only missing reviewers are written.
+    """
+    try:
+        # Same org the team was created in, not necessarily the repository owner
+        changes = envreconcile.get_reconciler(api_key, org=org).ensure(repo, [(env, team_slug) for env in ENVIRONMENTS])
+        if not changes:
+            logger.info(f"Environments {ENVIRONMENTS} already have reviewer {team_slug} in repo {repo}.")
+        return True
+    except (requests.exceptions.RequestException, ValueError) as e:
+        logger.error(f"Error ensuring environments for repo {repo}: {e}")
+        return None
 
 def create_pull_request(repo, pr_title, pr_description, base_branch, head_branch, api_key):
     try:
@@ -147,7 +271,7 @@ def create_pull_request(repo, pr_title, pr_description, base_branch, head_branch
             "head": head_branch,
             "base": base_branch
         }
-        response = requests.post(url, json=payload, headers=headers)
+        response = ghclient.post(url, json=payload, headers=headers)
         response.raise_for_status()
         pr_url = response.json()["_links"]["html"]["href"]
         logger.info(f"Pull request created: {pr_url}")
@@ -156,81 +280,276 @@ def create_pull_request(repo, pr_title, pr_description, base_branch, head_branch
         logger.error(f"Error creating pull request for repo {repo}: {e}")
         return None
 
-# ----------------- CSV Report Handling ----------------- #
-def update_csv_report(csv_file, repo, branch, folder_name, team_name, members, pr_url):
-    try:
-        rows = []
-        if os.path.exists(csv_file):
-            with open(csv_file, mode="r", newline="") as f:
-                reader = csv.reader(f)
-                rows = list(reader)
-        else:
-            rows.append(["repository", "branch", "folderName", "teamName", "members", "prUrl"])
-        updated = False
-        for row in rows:
-            if row[0] == repo and row[1] == branch and row[2] == folder_name:
-                row[3] = team_name
-                row[4] = members
-                row[5] = pr_url
-                updated = True
-                break
-        if not updated:
-            rows.append([repo, branch, folder_name, team_name, members, pr_url])
-        with open(csv_file, mode="w", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerows(rows)
-        logger.info(f"CSV report updated with PR URL for {repo} and {branch}")
-    except Exception as e:
-        logger.error(f"Error updating CSV report: {e}")
+# ----------------- Git Data API Backend ----------------- #
+def commit_files_via_api(repo, base_branch, head_branch, yaml_data, message, api_key):
+    """
+    Create head_branch with one commit adding/overwriting the YAML files, without a checkout.
+    The blobs are created server-side from the inline tree entries, so a record
+    costs five calls: read base ref, read base commit, create tree, create commit, create ref.
+    Returns the new commit SHA.
+    """
+    api_url = f"https://api.github.com/repos/{repo}/git"
+    headers = {'Authorization': f'token {api_key}'}
 
-# ----------------- Main Processing Function ----------------- #
-def process_record_and_create_pr(record, api_key, org, csv_file):
-    try:
-        workspace_name = generate_random_workspace_name()
-        logger.info(f"Processing record for repo: {record['repository']}, branch: {record['branch']}, folder: {record.get('folderName', 'default')}")
-        
-        clone_path = os.path.join("/path/to/clone", workspace_name)
-        clone_repository(record["repository"], clone_path)
-        
-        # Prepare YAML data.
-        # We assume keys starting with "dbConfigYaml" and "workflowYaml".
-        # For each dbConfigYaml, we inject folderName from the record.
-        yaml_data = {"dbConfigYaml": [], "workflowYaml": []}
-        for key, value in record.items():
-            if key.startswith("dbConfigYaml"):
-                value["folderName"] = record.get("folderName", "default")
-                yaml_data["dbConfigYaml"].append(value)
-            elif key.startswith("workflowYaml"):
-                yaml_data["workflowYaml"].append(value)
-        
-        copy_yaml_files_to_repo(clone_path, yaml_data)
-        
-        team_slug = None
-        team_name = ""
-        members_str = ""
-        if "githubTeam" in record:
-            team_slug = create_github_team_and_add_members(org, record["githubTeam"], api_key)
-            team_name = record["githubTeam"].get("teamName", "")
-            members_str = "|".join(record["githubTeam"].get("members", []))
-        
-        if team_slug:
-            ensure_environments(record["repository"], org, team_slug, api_key)
-        
-        unique_branch_name = generate_unique_branch_name(record.get("branch", "main"))
-        
-        pr_url = create_pull_request(
+    response = ghclient.get(f"{api_url}/ref/heads/{base_branch}", headers=headers)
+    response.raise_for_status()
+    base_sha = response.json()["object"]["sha"]
+
+    response = ghclient.get(f"{api_url}/commits/{base_sha}", headers=headers)
+    response.raise_for_status()
+    base_tree_sha = response.json()["tree"]["sha"]
+
+    tree_entries = [
+        {"path": yaml_repo_path(yaml_type, yaml_info), "mode": "100644", "type": "blob", "content": yaml_info["content"]}
+        for yaml_type, yaml_list in yaml_data.items()
+        for yaml_info in yaml_list
+    ]
+    response = ghclient.post(f"{api_url}/trees", json={"base_tree": base_tree_sha, "tree": tree_entries}, headers=headers)
+    response.raise_for_status()
+    tree_sha = response.json()["sha"]
+
+    response = ghclient.post(f"{api_url}/commits", json={"message": message, "tree": tree_sha, "parents": [base_sha]}, headers=headers)
+    response.raise_for_status()
+    commit_sha = response.json()["sha"]
+
+    response = ghclient.post(f"{api_url}/refs", json={"ref": f"refs/heads/{head_branch}", "sha": commit_sha}, headers=headers)
+    response.raise_for_status()
+    logger.info(f"Created branch {head_branch} in {repo} at {commit_sha} with {len(tree_entries)} files via Git Data API.")
+    return commit_sha
+
+# ----------------- Record Timing ----------------- #
+BACKEND = "git"  # set from --backend
+RECORD_TIMINGS = []  # (repo, backend, seconds) per record
+_record_timings_lock = threading.Lock()
+
+def log_record_timings():
+    with _record_timings_lock:
+        timings = [elapsed for _, _, elapsed in RECORD_TIMINGS]
+    if timings:
+        logger.info(f"Record timings ({BACKEND} backend): {len(timings)} records, "
+                    f"avg {sum(timings) / len(timings):.1f}s, max {max(timings):.1f}s")
+
+# ----------------- Concurrency Limits ----------------- #
+ORG_API_CONCURRENCY = 4
+_org_semaphores = {}
+_org_semaphores_lock = threading.Lock()
+
+def org_api_slot(org):
+    """
+    Return the semaphore bounding concurrent GitHub API calls for an organization.
+    Use it as a context manager around each group of API calls.
+    """
+    with _org_semaphores_lock:
+        if org not in _org_semaphores:
+            _org_semaphores[org] = threading.BoundedSemaphore(ORG_API_CONCURRENCY)
+        return _org_semaphores[org]
+
+def record_org(record, default_org):
+    repo = record.get("repository", "")
+    return repo.split("/")[0] if "/" in repo else default_org
+
+# ----------------- Checkpointing ----------------- #
+JOURNAL = None  # set from --journal-file / --resume
+
+def run_stage(key, stage, func):
+    """Run one record stage through the checkpoint journal when it is enabled."""
+    if JOURNAL:
+        return JOURNAL.run_stage(key, stage, func)
+    return func()
+
+# ----------------- Record Stages ----------------- #
+# A record is processed as clone -> files -> push -> api. The stages share a
+# per-record job dict and raise on failure; process_record_and_create_pr runs
+# them back to back, --pipeline runs each stage on its own worker pool.
+def new_record_job(record, api_key, org):
+    logger.info(f"Processing record for repo: {record['repository']}, branch: {record['branch']}, folder: {record.get('folderName', 'default')}")
+    # Prepare YAML data.
+    # We assume keys starting with "dbConfigYaml" and "workflowYaml".
+    # For each dbConfigYaml, we inject folderName from the record.
+    yaml_data = {"dbConfigYaml": [], "workflowYaml": []}
+    for yaml_key, value in record.items():
+        if yaml_key.startswith("dbConfigYaml"):
+            value["folderName"] = record.get("folderName", "default")
+            yaml_data["dbConfigYaml"].append(value)
+        elif yaml_key.startswith("workflowYaml"):
+            yaml_data["workflowYaml"].append(value)
+    key = record_key(record)
+    return {
+        "record": record,
+        "key": key,
+        "api_key": api_key,
+        "org": org,
+        "yaml_data": yaml_data,
+        # Named once per record: push_stage pushes it and api_stage opens the PR from it.
+        "head_branch": run_stage(key, "branch", lambda: generate_unique_branch_name(record.get("branch", "main"))),
+        "clone_path": None,
+        "start": time.monotonic(),
+    }
+
+def git_work_needed(job):
+    """Git backend, and the commit was not already pushed by an earlier (resumed) run."""
+    return BACKEND == "git" and not (JOURNAL is not None and JOURNAL.get(job["key"], "commit")[0])
+
+def clone_stage(job):
+    if not git_work_needed(job):
+        return job
+    record, key = job["record"], job["key"]
+    sparse_paths = [".github/workflows", record.get("folderName", "default")]
+    clone = lambda: clone_repository(
+        record["repository"], os.path.join("/path/to/clone", generate_random_workspace_name()),
+        record.get("branch"), sparse_paths)
+    clone_path = run_stage(key, "clone", clone)
+    if clone_path and not os.path.isdir(clone_path):
+        # The workspace of the earlier attempt is gone; start this record's git work over.
+        JOURNAL.clear(key, "clone", "files")
+        clone_path = run_stage(key, "clone", clone)
+    if not clone_path:
+        raise RuntimeError("clone failed")
+    job["clone_path"] = clone_path
+    return job
+
+def files_stage(job):
+    if not git_work_needed(job):
+        return job
+    if not run_stage(job["key"], "files", lambda: copy_yaml_files_to_repo(job["clone_path"], job["yaml_data"])):
+        raise RuntimeError("writing YAML files failed")
+    return job
+
+def push_stage(job):
+    if BACKEND != "git":
+        return job
+    record, key = job["record"], job["key"]
+    run_stage(key, "commit", lambda: commit_and_push_changes(job["clone_path"], job["head_branch"], record["prDetails"]["title"]))
+    return job
+
+def api_stage(job):
+    record, key, api_key, org = job["record"], job["key"], job["api_key"], job["org"]
+    team_slug = None
+    team_name = ""
+    members_str = ""
+    api_slot = org_api_slot(record_org(record, org))
+    if "githubTeam" in record:
+        with api_slot:
+            team_slug = run_stage(key, "team", lambda: create_github_team_and_add_members(org, record["githubTeam"], api_key))
+        team_name = record["githubTeam"].get("teamName", "")
+        members_str = "|".join(record["githubTeam"].get("members", []))
+    
+    if team_slug:
+        with api_slot:
+            run_stage(key, "environments", lambda: ensure_environments(record["repository"], org, team_slug, api_key))
+    
+    head_branch = job["head_branch"]
+    if BACKEND == "api":
+        with api_slot:
+            run_stage(key, "commit", lambda: commit_files_via_api(record["repository"], record["branch"], head_branch, job["yaml_data"], record["prDetails"]["title"], api_key))
+    
+    with api_slot:
+        pr_url = run_stage(key, "pr", lambda: create_pull_request(
             record["repository"],
             record["prDetails"]["title"],
             record["prDetails"]["description"],
             record["branch"],
-            unique_branch_name,
+            head_branch,
             api_key
-        )
-        
-        update_csv_report(csv_file, record["repository"], record["branch"], record["folderName"], team_name, members_str, pr_url)
+        ))
+    
+    job["report_row"] = (record["repository"], record["branch"], record["folderName"], team_name, members_str, pr_url)
+    elapsed = time.monotonic() - job["start"]
+    with _record_timings_lock:
+        RECORD_TIMINGS.append((record["repository"], BACKEND, elapsed))
+    logger.info(f"Record {record['repository']} processed in {elapsed:.1f}s ({BACKEND} backend)")
+    return job
+
+RECORD_STAGES = [("clone", clone_stage), ("files", files_stage), ("push", push_stage), ("api", api_stage)]
+
+# ----------------- Main Processing Function ----------------- #
+def process_record_and_create_pr(record, api_key, org, report=None):
+    """
+    Process a single record and return its report row
+    (repository, branch, folderName, teamName, members, prUrl), or None on failure.
+    The report sink is only updated here when one is given.
+    Every completed stage is recorded in the checkpoint journal, so a resumed
+    run skips the stages (and reuses the branch name) of earlier attempts.
+    """
+    try:
+        job = new_record_job(record, api_key, org)
+        for _, stage in RECORD_STAGES:
+            job = stage(job)
+        if report:
+            report.upsert(*job["report_row"])
+        return job["report_row"]
         
     except Exception as e:
         logger.error(f"Error processing record {record['repository']} with branch {record['branch']}: {e}")
+        return None
+
+# ----------------- Parallel Processing ----------------- #
+def process_records(records, api_key, org, report, workers=1):
+    """
+    Process all records with a bounded worker pool.
+    Report rows are written by this (single) thread in input order, so the CSV
+    report is identical to a serial run regardless of completion order.
+    """
+    if workers <= 1:
+        for record in records:
+            process_record_and_create_pr(record, api_key, org, report)
+        return
+
+    logger.info(f"Processing records with {workers} workers.")
+    results = {}
+    next_index = 0
+    futures = {}
+
+    def collect(done):
+        nonlocal next_index
+        for future in done:
+            results[futures.pop(future)] = future.result()
+        # Flush the contiguous completed prefix so the report keeps input order.
+        while next_index in results:
+            report_row = results.pop(next_index)
+            if report_row:
+                report.upsert(*report_row)
+            next_index += 1
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # Keep a bounded number of records in flight so streamed input is consumed lazily.
+        for index, record in enumerate(records):
+            futures[executor.submit(process_record_and_create_pr, record, api_key, org)] = index
+            if len(futures) >= workers * 2:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                collect(done)
+        collect(as_completed(list(futures)))
+
+def process_records_pipelined(records, api_key, org, report, git_workers=4, fs_workers=1, api_workers=4):
+    """
+    Process records as a staged pipeline (clone -> files -> push -> api) with bounded
+    queues between stages, so git I/O of one record overlaps API calls of another.
+    Report rows are still written by this thread in input order.
+    """
+    logger.info(f"Processing records as a pipeline: git={git_workers}, fs={fs_workers}, api={api_workers} workers.")
+    workers = {"clone": git_workers, "files": fs_workers, "push": git_workers, "api": api_workers}
+
+    def start_stage(record):
+        # The job is built inside the first stage, so a malformed record fails on its own
+        return clone_stage(new_record_job(record, api_key, org))
+
+    stage_funcs = dict(RECORD_STAGES, clone=start_stage)
+    stages = [(name, stage_funcs[name], max(1, workers[name])) for name, _ in RECORD_STAGES]
+    pipeline = StagePipeline(stages, queue_size=2 * max(git_workers, api_workers, 1))
+    results = {}
+    next_index = 0
+
+    def on_result(index, job):
+        nonlocal next_index
+        results[index] = job["report_row"] if job else None
+        # Flush the contiguous completed prefix so the report keeps input order.
+        while next_index in results:
+            report_row = results.pop(next_index)
+            if report_row:
+                report.upsert(*report_row)
+            next_index += 1
+
+    pipeline.run(records, on_result)
 
 # ----------------- Main Entry Point ----------------- #
 if __name__ == "__main__":
@@ -239,6 +558,18 @@ if __name__ == "__main__":
     api_key = args.api_token
     org = "your-org-name"  # Replace with your GitHub organization name
     csv_file = args.report_file
+    ORG_API_CONCURRENCY = max(1, args.org_concurrency)
+    BACKEND = args.backend
+    CLONE_MODE = args.clone_mode
+    teamindex.TEAM_CACHE_TTL = args.team_cache_ttl
+    if args.mirror_dir:
+        MIRROR_CACHE = MirrorCache(args.mirror_dir, args.mirror_budget_gb)
+    try:
+        JOURNAL = CheckpointJournal(args.journal_file or f"{csv_file}.checkpoint.db", resume=args.resume, fresh=args.fresh)
+    except RuntimeError as e:
+        logger.error(f"{e}; pass --resume to continue that run or --fresh to discard it.")
+        exit(1)
+    ghclient.configure(pool_maxsize=args.pool_size or max(ghclient.POOL_MAXSIZE, args.workers, args.api_workers))
     
     # Fetch JSON data from the API using the input payload
     try:
@@ -247,15 +578,34 @@ if __name__ == "__main__":
         logger.error(f"Error decoding input payload: {e}")
         exit(1)
     
-    json_data = fetch_json_data(args.api_url, input_payload)
-    if json_data is None:
-        logger.error("No JSON data returned from API. Exiting.")
-        exit(1)
-    
-    # Write the JSON output file for record keeping
-    with open(args.json_output_file, "w") as f:
-        json.dump(json_data, f, indent=4)
+    if args.stream:
+        # Records are yielded while downloading; raw bytes are teed to the output file
+        json_data = stream_json_data(args.api_url, input_payload, args.json_output_file)
+    else:
+        json_data = fetch_json_data(args.api_url, input_payload)
+        if json_data is None:
+            logger.error("No JSON data returned from API. Exiting.")
+            exit(1)
+        
+        # Write the JSON output file for record keeping
+        with open(args.json_output_file, "w") as f:
+            json.dump(json_data, f, indent=4)
     
     # Process each record in the JSON data (expected to be a list)
-    for record in json_data:
-        process_record_and_create_pr(record, api_key, org, csv_file)
\ No newline at end of file
+    try:
+        with CsvReportSink(csv_file) as report:
+            if args.pipeline:
+                process_records_pipelined(json_data, api_key, org, report, args.git_workers, args.fs_workers, args.api_workers)
+            else:
+                process_records(json_data, api_key, org, report, workers=args.workers)
+    except (requests.exceptions.RequestException, ValueError):
+        # The stream broke mid-way; records already processed are in the report and journal
+        logger.error("Input stream failed; remaining records were not processed.")
+        JOURNAL.close()
+        exit(1)
+    JOURNAL.close()
+    ghclient.log_stats()
+    teamindex.log_stats()
+    envreconcile.log_stats()
+    log_clone_stats()
+    log_record_timings()
\ No newline at end of file
@@ -0,0 +1,129 @@
+import queue
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+# ----------------- Staged Pipeline ----------------- #
+class StagePipeline:
+    """
+    Runs items through a chain of stages, each with its own worker pool and a
+    bounded input queue, so different items can be in different stages at the
+    same time (e.g. one record cloning while another waits on the GitHub API).
+
+    stages is a list of (name, func, workers); func(item) returns the item for
+    the next stage and raises on failure. Results are handed back in the
+    calling thread as (index, item) - item is None when a stage failed - so
+    the caller stays the single writer for reports. If iterating the input
+    raises, the items already fed are finished and run() re-raises the error.
+    """
+
+    def __init__(self, stages, queue_size=8, monitor_interval=30):
+        self.stages = stages
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+        self.output = queue.Queue()
+        self.monitor_interval = monitor_interval
+        self.max_depth = {name: 0 for name, _, _ in stages}
+        self.processed = {name: 0 for name, _, _ in stages}
+        self.failed = {name: 0 for name, _, _ in stages}
+        self.busy_seconds = {name: 0.0 for name, _, _ in stages}
+        self._stats_lock = threading.Lock()
+        self._remaining_workers = [workers for _, _, workers in stages]
+        self._done = threading.Event()
+        self.feed_error = None
+
+    def depths(self):
+        return {name: self.queues[i].qsize() for i, (name, _, _) in enumerate(self.stages)}
+
+    def _put(self, stage_index, entry):
+        self.queues[stage_index].put(entry)
+        depth = self.queues[stage_index].qsize()
+        name = self.stages[stage_index][0]
+        with self._stats_lock:
+            self.max_depth[name] = max(self.max_depth[name], depth)
+
+    def _worker(self, stage_index):
+        name, func, _ = self.stages[stage_index]
+        is_last = stage_index == len(self.stages) - 1
+        while True:
+            entry = self.queues[stage_index].get()
+            if entry is _STOP:
+                break
+            index, item = entry
+            start = time.monotonic()
+            try:
+                item = func(item)
+                ok = True
+            except Exception as e:
+                logger.error(f"Pipeline stage '{name}' failed for item {index}: {e}")
+                ok = False
+            with self._stats_lock:
+                self.busy_seconds[name] += time.monotonic() - start
+                self.processed[name] += 1
+                self.failed[name] += int(not ok)
+            if not ok:
+                self.output.put((index, None))
+            elif is_last:
+                self.output.put((index, item))
+            else:
+                self._put(stage_index + 1, (index, item))
+
+        # The last worker of a stage to stop shuts down the next stage.
+        with self._stats_lock:
+            self._remaining_workers[stage_index] -= 1
+            last_worker = self._remaining_workers[stage_index] == 0
+        if last_worker and not is_last:
+            for _ in range(self.stages[stage_index + 1][2]):
+                self.queues[stage_index + 1].put(_STOP)
+        elif last_worker:
+            self.output.put(_STOP)
+
+    def _feed(self, items):
+        try:
+            for index, item in enumerate(items):
+                self._put(0, (index, item))
+        except Exception as e:
+            logger.error(f"Pipeline input failed: {e}")
+            self.feed_error = e
+        finally:
+            for _ in range(self.stages[0][2]):
+                self.queues[0].put(_STOP)
+
+    def _monitor(self):
+        while not self._done.wait(self.monitor_interval):
+            logger.info(f"Pipeline queue depths: {self.depths()}")
+
+    def run(self, items, on_result):
+        """
+        Feed items through all stages; on_result(index, item) is called in this thread.
+        Raises the input's exception, after the items fed before it are done, if items failed.
+        """
+        threads = [threading.Thread(target=self._feed, args=(items,), daemon=True)]
+        for stage_index, (name, _, workers) in enumerate(self.stages):
+            for n in range(workers):
+                threads.append(threading.Thread(target=self._worker, args=(stage_index,), name=f"{name}-{n}", daemon=True))
+        threads.append(threading.Thread(target=self._monitor, daemon=True))
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                entry = self.output.get()
+                if entry is _STOP:
+                    break
+                on_result(*entry)
+        finally:
+            self._done.set()
+        self.log_stats()
+        if self.feed_error is not None:
+            raise self.feed_error
+
+    def log_stats(self):
+        with self._stats_lock:
+            for name, _, workers in self.stages:
+                logger.info(
+                    f"Pipeline stage '{name}': {workers} workers, {self.processed[name]} processed, "
+                    f"{self.failed[name]} failed, busy {self.busy_seconds[name]:.1f}s, max queue depth {self.max_depth[name]}"
+                )
@@ -0,0 +1,94 @@
+import csv
+import os
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+REPORT_HEADER = ["repository", "branch", "folderName", "teamName", "members", "prUrl"]
+
+# ----------------- CSV Report Sink ----------------- #
+class CsvReportSink:
+    """
+    Single-writer CSV report keyed by (repository, branch, folderName).
+
+    The existing report is read once into an in-memory index. Every upsert is
+    appended to a journal file next to the report (flushed and fsync'd, so a
+    killed run keeps its progress), and the report itself is rewritten only
+    once, atomically, when the sink is closed. A journal left behind by a
+    crashed run is replayed on open.
+    """
+
+    def __init__(self, csv_file, header=REPORT_HEADER, key_size=3, fsync=True):
+        self.csv_file = csv_file
+        self.journal_file = f"{csv_file}.journal"
+        self.header = list(header) if header else None
+        self.key_size = key_size
+        self.fsync = fsync
+        self.rows = {}  # dicts keep insertion order, i.e. report order
+        self._lock = threading.Lock()
+        self._load()
+        self._journal = open(self.journal_file, mode="a", newline="")
+        self._writer = csv.writer(self._journal)
+
+    def _load(self):
+        if os.path.exists(self.csv_file):
+            with open(self.csv_file, mode="r", newline="") as f:
+                rows = list(csv.reader(f))
+            if rows and self.header and rows[0][:len(self.header)] == self.header:
+                rows = rows[1:]
+            elif rows and not self.header:
+                self.header, rows = rows[0], rows[1:]
+            for row in rows:
+                self.rows[tuple(row[:self.key_size])] = row
+        if os.path.exists(self.journal_file):
+            replayed = 0
+            with open(self.journal_file, mode="r", newline="") as f:
+                for row in csv.reader(f):
+                    if row:
+                        self.rows[tuple(row[:self.key_size])] = row
+                        replayed += 1
+            logger.info(f"Recovered {replayed} report rows from journal {self.journal_file}")
+
+    def get(self, *key):
+        with self._lock:
+            return self.rows.get(tuple(key))
+
+    def upsert(self, *row):
+        """Insert or replace the row with the same key and journal it."""
+        row = ["" if value is None else str(value) for value in row]
+        with self._lock:
+            self.rows[tuple(row[:self.key_size])] = row
+            self._writer.writerow(row)
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+        logger.info(f"CSV report updated for {row[0]} and {row[1]}")
+
+    def compact(self):
+        """Rewrite the report from the index atomically and truncate the journal."""
+        with self._lock:
+            tmp_file = f"{self.csv_file}.tmp"
+            with open(tmp_file, mode="w", newline="") as f:
+                writer = csv.writer(f)
+                if self.header:
+                    writer.writerow(self.header)
+                writer.writerows(self.rows.values())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.csv_file)
+            self._journal.seek(0)
+            self._journal.truncate()
+        logger.info(f"CSV report {self.csv_file} written with {len(self.rows)} rows.")
+
+    def close(self):
+        self.compact()
+        self._journal.close()
+        os.remove(self.journal_file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
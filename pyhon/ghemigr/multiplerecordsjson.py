@@ -9,6 +9,8 @@ import random
 import string
 from pathlib import Path
 
+from mirrorcache import MirrorCache
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 
@@ -37,6 +39,9 @@ HEADERS = {
 def generate_workspace_name():
     return "ws_" + "".join(random.choices(string.ascii_lowercase + string.digits, k=8))
 
+# Shared bare-mirror cache, enabled with --mirror-dir
+MIRROR_CACHE = None
+
 # Clone the repository into a unique workspace
 def clone_repository(repo_name, branch):
     workspace = generate_workspace_name()
@@ -45,7 +50,10 @@ def clone_repository(repo_name, branch):
     clone_path = os.path.join(workspace, repo_name)
     
     logging.info(f"Cloning repository {repo_name} (Branch: {branch}) into {workspace}")
-    os.system(f"git clone --branch {branch} {repo_url} {clone_path}")
+    if MIRROR_CACHE:
+        MIRROR_CACHE.clone(repo_name, repo_url, clone_path, branch)
+    else:
+        os.system(f"git clone --branch {branch} {repo_url} {clone_path}")
 
     return workspace, clone_path
 
@@ -121,6 +129,11 @@ def process_json(json_file):
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Process JSON and manage GitHub repositories.")
     parser.add_argument("--json-file", required=True, help="Path to the JSON file")
+    parser.add_argument("--mirror-dir", default=None, help="Enable the shared bare-mirror cache in this directory")
+    parser.add_argument("--mirror-budget-gb", type=float, default=20, help="Disk budget for the mirror cache before LRU eviction")
     args = parser.parse_args()
 
+    if args.mirror_dir:
+        MIRROR_CACHE = MirrorCache(args.mirror_dir, args.mirror_budget_gb)
+
     process_json(args.json_file)
\ No newline at end of file
@@ -0,0 +1,155 @@
+import hashlib
+import threading
+import time
+import logging
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+# ----------------- Scheduler Settings ----------------- #
+MAX_RATE = 15.0  # requests/second ceiling per token and host (~900/min secondary limit)
+MIN_RATE = 0.2  # floor used after repeated throttling
+BURST = 10  # bucket capacity
+INCREASE_STEP = 0.5  # additive increase per successful response
+DECREASE_FACTOR = 0.5  # multiplicative decrease when throttled
+DEFAULT_RETRY_AFTER = 60  # seconds to pause on a secondary limit without Retry-After
+LOW_WATER = 0.2  # start spreading the primary budget once this fraction is left
+
+# ----------------- Token Bucket ----------------- #
+class TokenBucket:
+    """
+    Token bucket for one (token, host) pair.
+    The refill rate adapts to the primary rate-limit budget reported by the
+    server and backs off (AIMD) when secondary limits are hit.
+    """
+
+    def __init__(self, rate=MAX_RATE, burst=BURST):
+        self.rate = rate
+        self.ceiling = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """Take one token and return how long the caller must sleep first."""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            wait = max(0.0, -self.tokens / self.rate, self.paused_until - now)
+            return wait
+
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.rate = max(MIN_RATE, self.rate * DECREASE_FACTOR)
+            self.tokens = min(self.tokens, 0.0)
+
+    def set_budget(self, remaining, limit, reset_in):
+        """
+        Run at full speed while the primary budget is healthy; below the low-water
+        mark spread what is left evenly over the rest of the reset window.
+        """
+        with self.lock:
+            if remaining <= 0:
+                # Budget exhausted: sleep until the window resets, then resume at full speed.
+                self.paused_until = max(self.paused_until, time.monotonic() + reset_in)
+                return
+            if limit and remaining > limit * LOW_WATER:
+                self.ceiling = MAX_RATE
+            else:
+                self.ceiling = max(MIN_RATE, min(MAX_RATE, remaining / max(reset_in, 1.0)))
+            self.rate = min(self.rate, self.ceiling)
+
+    def success(self):
+        with self.lock:
+            self.rate = min(self.ceiling, self.rate + INCREASE_STEP)
+
+# ----------------- Scheduler ----------------- #
+class RateLimitScheduler:
+    """
+    Paces requests per (token, host) using X-RateLimit-* and Retry-After headers.
+    Call acquire() before sending a request and observe() with the response;
+    observe() returns the number of seconds to wait before retrying when the
+    response was throttled, otherwise None.
+    """
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.issued = 0
+        self.waited = 0
+        self.wait_seconds = 0.0
+        self.throttled = 0
+
+    @staticmethod
+    def key_for(url, headers=None):
+        auth = (headers or {}).get("Authorization", "")
+        token_id = hashlib.sha1(auth.encode()).hexdigest()[:12] if auth else "anonymous"
+        return token_id, urlsplit(url).netloc
+
+    def _bucket(self, key):
+        with self._lock:
+            if key not in self._buckets:
+                self._buckets[key] = TokenBucket()
+            return self._buckets[key]
+
+    def acquire(self, key):
+        wait = self._bucket(key).reserve()
+        if wait > 0:
+            time.sleep(wait)
+        with self._stats_lock:
+            self.issued += 1
+            if wait > 0:
+                self.waited += 1
+                self.wait_seconds += wait
+
+    def observe(self, key, response):
+        bucket = self._bucket(key)
+        headers = response.headers
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        if remaining is not None and reset is not None:
+            try:
+                limit = int(headers.get("X-RateLimit-Limit", 0))
+                bucket.set_budget(int(remaining), limit, float(reset) - time.time())
+            except ValueError:
+                pass
+
+        throttled = response.status_code == 429 or (
+            response.status_code == 403 and (remaining == "0" or "Retry-After" in headers or "rate limit" in response.text.lower())
+        )
+        if not throttled:
+            bucket.success()
+            return None
+
+        retry_after = headers.get("Retry-After")
+        if retry_after is not None and retry_after.isdigit():
+            delay = int(retry_after)
+        elif remaining == "0" and reset is not None:
+            delay = max(1.0, float(reset) - time.time())
+        else:
+            delay = DEFAULT_RETRY_AFTER
+        bucket.pause(delay)
+        with self._stats_lock:
+            self.throttled += 1
+        logger.warning(f"Rate limited by {key[1]}; pausing {delay:.0f}s (rate now {bucket.rate:.2f} req/s)")
+        return delay
+
+    def summary(self):
+        with self._stats_lock:
+            return {
+                "issued": self.issued,
+                "waited": self.waited,
+                "wait_seconds": round(self.wait_seconds, 1),
+                "throttled": self.throttled,
+            }
+
+scheduler = RateLimitScheduler()
@@ -0,0 +1,167 @@
+import os
+import threading
+import time
+import logging
+
+import ghclient
+
+logger = logging.getLogger(__name__)
+
+# ----------------- Index Settings ----------------- #
+GITHUB_API_URL = "https://api.github.com"
+TEAM_CACHE_TTL = float(os.getenv("GHEMIGR_TEAM_CACHE_TTL", "900"))  # seconds before a listing is reloaded
+
+# ----------------- Team Index ----------------- #
+class TeamIndex:
+    """
+    Cached index of an organization's teams and team memberships.
+
+    The team list is loaded once with paginated list calls and each team's
+    members (including pending invitations) the first time the team is used;
+    both are reloaded after ttl seconds. ensure_team() and ensure_members()
+    then only create what is missing, so a team that shows up on many records
+    costs no API calls after the first one.
+    """
+
+    def __init__(self, org, api_key, ttl=None, api_url=GITHUB_API_URL):
+        self.org = org
+        self.api_url = api_url
+        self.ttl = TEAM_CACHE_TTL if ttl is None else ttl
+        self.headers = {"Authorization": f"token {api_key}", "Accept": "application/vnd.github.v3+json"}
+        self._lock = threading.Lock()
+        self._teams = {}  # lowercase name and slug -> slug
+        self._ids = {}  # slug -> team id
+        self._teams_loaded = 0.0
+        self._teams_stale = True  # reload on next find(); the dicts are never unset under readers
+        self._members = {}  # slug -> (loaded_at, set of lowercase logins)
+        self._key_locks = {}
+        self.created_teams = 0
+        self.added_members = 0
+        self.existing_members = 0
+
+    def _expired(self, loaded_at):
+        return time.monotonic() - loaded_at >= self.ttl
+
+    def _key_lock(self, key):
+        """Serialize work on one team so concurrent workers never create it twice."""
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _load_teams(self):
+        teams, ids = {}, {}
+        for team in ghclient.paginate(f"{self.api_url}/orgs/{self.org}/teams", headers=self.headers):
+            teams[team["slug"]] = team["slug"]
+            teams[team["name"].lower()] = team["slug"]
+            ids[team["slug"]] = team["id"]
+        logger.info(f"Loaded team index for {self.org}: {len(ids)} teams.")
+        return teams, ids
+
+    def invalidate(self):
+        """Reload teams and memberships on next use; lookups in flight keep the current index."""
+        with self._key_lock("__teams__"), self._lock:
+            self._teams_stale = True
+            self._members.clear()
+
+    def find(self, team):
+        """Return the slug of a team given its name or slug, or None if it does not exist."""
+        with self._key_lock("__teams__"):
+            if self._teams_stale or self._expired(self._teams_loaded):
+                teams, ids = self._load_teams()
+                with self._lock:
+                    self._teams, self._ids, self._teams_loaded = teams, ids, time.monotonic()
+                    self._teams_stale = False
+        with self._lock:
+            return self._teams.get(team.lower()) or self._teams.get(team.lower().replace(" ", "-"))
+
+    def team_id(self, team):
+        """Return the numeric id of a team given its name or slug, or None if it does not exist."""
+        team_slug = self.find(team)
+        with self._lock:
+            return self._ids.get(team_slug)
+
+    def members(self, team_slug):
+        """Return the lowercase logins of active and invited members of a team."""
+        with self._lock:
+            cached = self._members.get(team_slug)
+        if cached is not None and not self._expired(cached[0]):
+            return cached[1]
+        team_url = f"{self.api_url}/orgs/{self.org}/teams/{team_slug}"
+        logins = {member["login"].lower() for member in ghclient.paginate(f"{team_url}/members", headers=self.headers)}
+        logins.update(
+            invitation["login"].lower()
+            for invitation in ghclient.paginate(f"{team_url}/invitations", headers=self.headers)
+            if invitation.get("login")
+        )
+        with self._lock:
+            self._members[team_slug] = (time.monotonic(), logins)
+        return logins
+
+    def ensure_team(self, team_name, **payload):
+        """Return the slug of team_name, creating the team (with payload) only if it is missing."""
+        with self._key_lock(team_name.lower()):
+            team_slug = self.find(team_name)
+            if team_slug:
+                return team_slug
+            response = ghclient.post(
+                f"{self.api_url}/orgs/{self.org}/teams", json={"name": team_name, **payload}, headers=self.headers
+            )
+            if response.status_code == 422:
+                # Created by someone else since the index was loaded.
+                self.invalidate()
+                team_slug = self.find(team_name)
+                if team_slug:
+                    return team_slug
+            response.raise_for_status()
+            team = response.json()
+            team_slug = team["slug"]
+            with self._lock:
+                self._ids[team_slug] = team["id"]
+                self._teams[team_name.lower()] = team_slug
+                self._teams[team_slug] = team_slug
+                self._members[team_slug] = (time.monotonic(), set())
+                self.created_teams += 1
+            logger.info(f"GitHub team {team_name} created with slug {team_slug}.")
+            return team_slug
+
+    def ensure_members(self, team_slug, members):
+        """Add the members that are not yet on the team and return their logins."""
+        with self._key_lock(f"members:{team_slug}"):
+            current = self.members(team_slug)
+            missing = [member for member in members if member.lower() not in current]
+            with self._lock:
+                self.existing_members += len(members) - len(missing)
+            for member in missing:
+                response = ghclient.put(
+                    f"{self.api_url}/orgs/{self.org}/teams/{team_slug}/memberships/{member}", headers=self.headers
+                )
+                response.raise_for_status()
+                with self._lock:
+                    current.add(member.lower())
+                    self.added_members += 1
+                logger.info(f"Added member {member} to team {team_slug}.")
+            return missing
+
+    def summary(self):
+        with self._lock:
+            return {
+                "created_teams": self.created_teams,
+                "added_members": self.added_members,
+                "existing_members": self.existing_members,
+            }
+
+# ----------------- Shared Indexes ----------------- #
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_index(org, api_key, ttl=None):
+    """Return the shared TeamIndex for an organization and token."""
+    with _indexes_lock:
+        if (org, api_key) not in _indexes:
+            _indexes[(org, api_key)] = TeamIndex(org, api_key, ttl=ttl)
+        return _indexes[(org, api_key)]
+
+def log_stats():
+    with _indexes_lock:
+        indexes = list(_indexes.values())
+    for index in indexes:
+        logger.info(f"Team index stats for {index.org}: {index.summary()}")
@@ -0,0 +1,154 @@
+import os
+import sys
+import time
+import logging
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+
+# Incremental JSON array parser, shared with the migration scripts in pyhon/ghemigr
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "ghemigr"))
+from jsonstream import iter_json_array
+
+logger = logging.getLogger(__name__)
+
+# Base URL pattern for Jenkins instances
+BASE_URL = 'https://jenkins-{}.company.net'
+
+# Endpoint to get the list of nodes/agents
+NODES_ENDPOINT_TEMPLATE = '{}/computer/api/json'
+
+# Only the fields the scripts read; the full computer JSON (monitor data, executors,
+# actions) runs to several MB on large controllers. None requests the full payload.
+NODE_FIELDS = ("displayName", "offline", "numExecutors", "launchSupported")
+
+# ----------------- Inventory Settings ----------------- #
+DEFAULT_WORKERS = int(os.getenv("JENKINS_INVENTORY_WORKERS", "16"))
+REQUEST_TIMEOUT = float(os.getenv("JENKINS_INVENTORY_TIMEOUT", "60"))
+POOL_CONNECTIONS = int(os.getenv("JENKINS_POOL_CONNECTIONS", "64"))  # distinct controllers kept alive
+POOL_MAXSIZE = int(os.getenv("JENKINS_POOL_MAXSIZE", "4"))  # keep-alive connections per controller
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# SSL verification is bypassed for the controllers; warn once, not once per request.
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# nodes is the 'computer' list on success; error is None on success.
+# payload_bytes is the decoded size of the response body.
+InstanceResult = namedtuple("InstanceResult", ["instance", "jenkins_url", "nodes", "error", "latency", "payload_bytes"])
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """Shared session: one keep-alive pool per controller, reused across threads and calls."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.verify = False
+            adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+def parse_instances(value):
+    """'a,b,c' or '@file' (one instance per line, '#' comments allowed) -> list of instance names."""
+    if value.startswith("@"):
+        with open(value[1:]) as f:
+            names = [line.split("#", 1)[0].strip() for line in f]
+    else:
+        names = [name.strip() for name in value.split(",")]
+    return list(dict.fromkeys(name for name in names if name))
+
+# ----------------- Node Inventory ----------------- #
+def tree_param(fields):
+    """('displayName', 'offline') -> 'computer[displayName,offline]'"""
+    return f"computer[{','.join(fields)}]"
+
+def iter_computers(chunks):
+    """
+    Yield the elements of the top-level "computer" array from a streamed
+    /computer/api/json body, one node at a time, without holding the document.
+    """
+    chunks = iter(chunks)
+    head = b""
+    for chunk in chunks:
+        head += chunk
+        key = head.find(b'"computer"')
+        start = head.find(b"[", key) if key != -1 else -1
+        if start != -1:
+            break
+    else:
+        raise ValueError("No 'computer' array in response")
+
+    def rest():
+        yield head[start:]
+        yield from chunks
+
+    yield from iter_json_array(rest())
+
+def fetch_nodes(instance_name, username, api_token, timeout=REQUEST_TIMEOUT, fields=NODE_FIELDS):
+    """
+    Query /computer/api/json on one controller; never raises, failures land in result.error.
+    With fields set, Jenkins renders only those node fields (tree=computer[...]), and the
+    body is stream-parsed node by node; payload size and fetch time are logged.
+    """
+    jenkins_url = BASE_URL.format(instance_name)
+    nodes_endpoint = NODES_ENDPOINT_TEMPLATE.format(jenkins_url)
+    params = {"tree": tree_param(fields)} if fields else None
+    payload_bytes = 0
+
+    def counted(response):
+        nonlocal payload_bytes
+        for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE):
+            payload_bytes += len(chunk)
+            yield chunk
+
+    start = time.monotonic()
+    try:
+        with get_session().get(nodes_endpoint, params=params, auth=HTTPBasicAuth(username, api_token),
+                               timeout=timeout, stream=True) as response:
+            if response.status_code != 200:
+                error = f"Status Code: {response.status_code}, Response: {response.text[:200]}"
+                return InstanceResult(instance_name, jenkins_url, None, error, time.monotonic() - start, len(response.content))
+            nodes = list(iter_computers(counted(response)))
+        latency = time.monotonic() - start
+        logger.info(f"{instance_name}: {len(nodes)} nodes, {payload_bytes / 1024:.1f} KiB in {latency:.2f}s"
+                    f" ({'tree=' + params['tree'] if params else 'full payload'})")
+        return InstanceResult(instance_name, jenkins_url, nodes, None, latency, payload_bytes)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        return InstanceResult(instance_name, jenkins_url, None, str(e), time.monotonic() - start, payload_bytes)
+
+def fetch_all(instances, username, api_token, workers=DEFAULT_WORKERS, timeout=REQUEST_TIMEOUT, fields=NODE_FIELDS):
+    """Query many controllers concurrently; returns results in the order of instances."""
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(instances) or 1))) as executor:
+        futures = {
+            executor.submit(fetch_nodes, instance, username, api_token, timeout, fields): instance
+            for instance in instances
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            if result.error:
+                logger.error(f"Failed to retrieve nodes from {result.instance}: {result.error}")
+            results[futures[future]] = result
+    return [results[instance] for instance in instances]
+
+def print_summary(results, out=sys.stdout):
+    """Per-instance status, node count, payload size and latency, followed by totals."""
+    print(f"\n{'Instance':<24} {'Status':<8} {'Nodes':>6} {'KiB':>9} {'Latency':>9}  Error", file=out)
+    for result in results:
+        status = "ok" if result.error is None else "failed"
+        count = len(result.nodes) if result.nodes is not None else "-"
+        print(f"{result.instance:<24} {status:<8} {count:>6} {result.payload_bytes / 1024:>9.1f} {result.latency:>8.2f}s  {result.error or ''}", file=out)
+    failed = sum(1 for result in results if result.error)
+    latencies = sorted(result.latency for result in results)
+    if latencies:
+        total_kib = sum(result.payload_bytes for result in results) / 1024
+        print(f"{len(results)} instances, {failed} failed, {total_kib:.1f} KiB total, latency max {latencies[-1]:.2f}s, "
+              f"median {latencies[len(latencies) // 2]:.2f}s", file=out)
@@ -0,0 +1,57 @@
+import os
+import re
+from collections import namedtuple
+
+# ----------------- Classifier Settings ----------------- #
+NODE_NAME_PATTERNS = [p for p in os.getenv("JENKINS_NODE_PATTERNS", "cpvra,crvra,cuvra,ccvra").split(",") if p]
+FQDN_DOMAIN = os.getenv("JENKINS_NODE_DOMAIN", "company.net")
+
+# 'cpvra01-x1' -> NodeInfo('cpvra01-x1', 'cpvra01', 'cpvra01.company.net', 'x1', 'cpvra')
+NodeInfo = namedtuple("NodeInfo", ["name", "host", "fqdn", "subdir", "pool"])
+
+class NodeClassifier:
+    """
+    Match node names against name prefixes with one compiled regex and parse each
+    matching name once into a NodeInfo. Results are memoized, so the same name
+    classifies the same way however often it is seen.
+    """
+
+    def __init__(self, patterns=None, domain=FQDN_DOMAIN):
+        self.patterns = list(patterns if patterns is not None else NODE_NAME_PATTERNS)
+        self.domain = domain
+        # Longest prefix first, so the pool is the most specific pattern that matches.
+        alternatives = "|".join(re.escape(p) for p in sorted(set(self.patterns), key=len, reverse=True))
+        self._regex = re.compile(f"(?P<pool>{alternatives})") if alternatives else None
+        self._cache = {}
+
+    def classify(self, node_name):
+        """Return the NodeInfo for node_name, or None when it matches no pattern."""
+        try:
+            return self._cache[node_name]
+        except KeyError:
+            pass
+        match = self._regex.match(node_name) if self._regex else None
+        info = None
+        if match:
+            host, _, rest = node_name.partition("-")
+            info = NodeInfo(node_name, host, f"{host}.{self.domain}", rest.partition("-")[0], match.group("pool"))
+        self._cache[node_name] = info
+        return info
+
+    def select(self, nodes):
+        """Yield (node, NodeInfo) for the launchable nodes of a /computer listing that match."""
+        for node in nodes:
+            if not node.get("launchSupported", False):
+                continue
+            info = self.classify(node["displayName"])
+            if info is not None:
+                yield node, info
+
+_classifiers = {}
+
+def get_classifier(patterns=None, domain=FQDN_DOMAIN):
+    """Shared classifier per (patterns, domain), so scripts reuse the compiled regex and cache."""
+    key = (tuple(patterns if patterns is not None else NODE_NAME_PATTERNS), domain)
+    if key not in _classifiers:
+        _classifiers[key] = NodeClassifier(key[0], domain)
+    return _classifiers[key]
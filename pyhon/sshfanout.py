@@ -0,0 +1,104 @@
+import os
+import sys
+import time
+import logging
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import paramiko
+
+logger = logging.getLogger(__name__)
+
+# ----------------- Fan-out Settings ----------------- #
+DEFAULT_PARALLELISM = int(os.getenv("JENKINS_SSH_PARALLELISM", "32"))  # hosts worked on at once
+HOST_TIMEOUT = float(os.getenv("JENKINS_SSH_HOST_TIMEOUT", "120"))  # budget for all commands on one host
+
+# One result per submitted row; error is None when every command of the row ran.
+RowResult = namedtuple("RowResult", ["fqdn", "output", "error", "elapsed"])
+
+class Progress:
+    """Single overwriting 'done/total, elapsed, ETA' line on stderr, updated as hosts finish."""
+
+    def __init__(self, total, label="hosts", out=sys.stderr):
+        self.total = total
+        self.label = label
+        self.out = out
+        self.done = 0
+        self.failed = 0
+        self.start = time.monotonic()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _fmt(seconds):
+        minutes, seconds = divmod(int(seconds), 60)
+        return f"{minutes // 60}h{minutes % 60:02d}m{seconds:02d}s" if minutes >= 60 else f"{minutes}m{seconds:02d}s"
+
+    def update(self, failed=False):
+        with self._lock:
+            self.done += 1
+            self.failed += failed
+            elapsed = time.monotonic() - self.start
+            eta = elapsed / self.done * (self.total - self.done)
+            end = "\n" if self.done == self.total else ""
+            print(f"\r[{self.done}/{self.total} {self.label}] {100 * self.done / self.total:5.1f}% "
+                  f"elapsed {self._fmt(elapsed)} ETA {self._fmt(eta)} failed {self.failed}",
+                  end=end, file=self.out, flush=True)
+
+def _run_host(pool, fqdn, rows, host_timeout, results):
+    """Run the rows of one host in order, all within one host_timeout budget."""
+    deadline = time.monotonic() + host_timeout
+    failed = False
+    host_error = None  # connection/timeout failure; the host's remaining rows fail fast with it
+    for index, commands in rows:
+        if host_error is not None:
+            results[index] = RowResult(fqdn, "", host_error, 0.0)
+            continue
+        start = time.monotonic()
+        outputs = []
+        error = None
+        try:
+            for command in commands:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"host timeout of {host_timeout:.0f}s exceeded")
+                status, out, err = pool.exec_command(fqdn, command, timeout=remaining)
+                if out:
+                    outputs.append(out)
+                if status != 0:
+                    error = f"exit status {status}: {err}"
+                    break
+        except (paramiko.SSHException, OSError, EOFError) as e:
+            # socket.timeout and TimeoutError are OSErrors
+            error = host_error = str(e) or type(e).__name__
+        except Exception as e:
+            # Anything else stays this row's error instead of discarding the whole fleet's results
+            logger.exception(f"Unexpected error on {fqdn}")
+            error = f"{type(e).__name__}: {e}"
+        results[index] = RowResult(fqdn, "\n".join(outputs), error, time.monotonic() - start)
+        failed = failed or error is not None
+    return failed
+
+def fan_out(pool, rows, parallelism=DEFAULT_PARALLELISM, host_timeout=HOST_TIMEOUT, progress=True):
+    """
+    Run rows concurrently across hosts and return their RowResults in input order.
+    rows is a list of (fqdn, [command, ...]); rows of the same host run one after
+    another over that host's pooled transport, while up to parallelism hosts are
+    worked on at once.
+    """
+    by_host = {}
+    for index, (fqdn, commands) in enumerate(rows):
+        by_host.setdefault(fqdn, []).append((index, commands))
+
+    results = [None] * len(rows)
+    tracker = Progress(len(by_host)) if progress and by_host else None
+
+    def work(fqdn):
+        failed = _run_host(pool, fqdn, by_host[fqdn], host_timeout, results)
+        if tracker:
+            tracker.update(failed)
+
+    with ThreadPoolExecutor(max_workers=max(1, parallelism)) as executor:
+        for future in [executor.submit(work, fqdn) for fqdn in by_host]:
+            future.result()
+    return results
@@ -0,0 +1,170 @@
+import os
+import time
+import logging
+import threading
+
+import paramiko
+
+logger = logging.getLogger(__name__)
+
+# ----------------- Pool Settings ----------------- #
+IDLE_TIMEOUT = float(os.getenv("JENKINS_SSH_IDLE_TIMEOUT", "300"))  # close transports unused for this long
+CONNECT_TIMEOUT = float(os.getenv("JENKINS_SSH_CONNECT_TIMEOUT", "30"))
+KEEPALIVE_INTERVAL = int(os.getenv("JENKINS_SSH_KEEPALIVE", "30"))
+# Concurrent channels per transport; sshd's MaxSessions defaults to 10.
+MAX_SESSIONS = int(os.getenv("JENKINS_SSH_MAX_SESSIONS", "8"))
+
+class _Host:
+    __slots__ = ("client", "last_used", "active", "lock", "sessions")
+
+    def __init__(self):
+        self.client = None
+        self.last_used = 0.0
+        self.active = 0  # commands running on the transport; never reaped while > 0
+        self.lock = threading.Lock()
+        self.sessions = threading.BoundedSemaphore(MAX_SESSIONS)
+
+class SSHConnectionPool:
+    """
+    One authenticated paramiko transport per FQDN, shared by every command sent to
+    that host: each command is a new channel on the existing transport, so rows
+    that share a host pay for a single handshake and key exchange. Transports idle
+    for longer than idle_timeout, or found dead, are closed and reopened on demand.
+    """
+
+    def __init__(self, username="ejen", key_filename=None, idle_timeout=IDLE_TIMEOUT, connect_timeout=CONNECT_TIMEOUT):
+        self.username = username
+        self.key_filename = key_filename
+        self.idle_timeout = idle_timeout
+        self.connect_timeout = connect_timeout
+        self._hosts = {}
+        self._lock = threading.Lock()
+        self.handshakes = 0
+        self.reused = 0
+        self.reconnects = 0
+        self.commands = 0
+
+    def _host(self, fqdn):
+        with self._lock:
+            if fqdn not in self._hosts:
+                self._hosts[fqdn] = _Host()
+            return self._hosts[fqdn]
+
+    def _connect(self, fqdn):
+        client = paramiko.SSHClient()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect(fqdn, username=self.username, key_filename=self.key_filename, timeout=self.connect_timeout)
+        client.get_transport().set_keepalive(KEEPALIVE_INTERVAL)
+        with self._lock:
+            self.handshakes += 1
+        return client
+
+    def client(self, fqdn):
+        """Return a connected SSHClient for fqdn, reusing the pooled transport when it is alive and not idle-expired."""
+        self.reap_idle()
+        host = self._host(fqdn)
+        with host.lock:
+            if host.client is not None:
+                transport = host.client.get_transport()
+                if transport is not None and transport.is_active():
+                    host.last_used = time.monotonic()
+                    with self._lock:
+                        self.reused += 1
+                    return host.client
+                host.client.close()
+                host.client = None
+                with self._lock:
+                    self.reconnects += 1
+            host.client = self._connect(fqdn)
+            host.last_used = time.monotonic()
+            return host.client
+
+    def _discard(self, fqdn, client):
+        host = self._host(fqdn)
+        with host.lock:
+            if host.client is client:
+                host.client = None
+        client.close()
+
+    def exec_command(self, fqdn, command, timeout=None):
+        """
+        Run command on fqdn over a new channel of the pooled transport and wait for it.
+        Returns (exit_status, stdout, stderr) with the output decoded and stripped.
+        A transport that dropped since its last use is reopened once and the command retried.
+        """
+        host = self._host(fqdn)
+        with host.sessions:
+            with host.lock:
+                host.active += 1
+            try:
+                status, out, err = self._run(fqdn, command, timeout)
+            finally:
+                with host.lock:
+                    host.active -= 1
+                    host.last_used = time.monotonic()
+        with self._lock:
+            self.commands += 1
+        return status, out, err
+
+    def _run(self, fqdn, command, timeout):
+        for attempt in range(2):
+            client = self.client(fqdn)
+            try:
+                stdin, stdout, stderr = client.exec_command(command, timeout=timeout)
+                # Agents are not guaranteed to print UTF-8; never fail a command on its output
+                out = stdout.read().decode(errors="replace").strip()
+                err = stderr.read().decode(errors="replace").strip()
+                return stdout.channel.recv_exit_status(), out, err
+            except (paramiko.SSHException, EOFError) as e:
+                self._discard(fqdn, client)
+                if attempt:
+                    raise
+                logger.warning(f"SSH transport to {fqdn} dropped ({e}); reconnecting")
+
+    def reap_idle(self):
+        """Close transports that have not been used for idle_timeout seconds."""
+        now = time.monotonic()
+        with self._lock:
+            hosts = list(self._hosts.items())
+        for fqdn, host in hosts:
+            if host.client is not None and now - host.last_used > self.idle_timeout and host.lock.acquire(blocking=False):
+                try:
+                    if host.client is not None and not host.active and now - host.last_used > self.idle_timeout:
+                        logger.debug(f"Closing idle SSH transport to {fqdn}")
+                        host.client.close()
+                        host.client = None
+                finally:
+                    host.lock.release()
+
+    def close(self):
+        with self._lock:
+            hosts = list(self._hosts.values())
+        for host in hosts:
+            with host.lock:
+                if host.client is not None:
+                    host.client.close()
+                    host.client = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def summary(self):
+        """Handshakes performed vs commands run; every reused transport is a handshake saved."""
+        with self._lock:
+            return {
+                "hosts": len(self._hosts),
+                "commands": self.commands,
+                "handshakes": self.handshakes,
+                "handshakes_saved": self.reused,
+                "reconnects": self.reconnects,
+            }
+
+    def log_stats(self):
+        stats = self.summary()
+        logger.info(
+            f"SSH pool: {stats['commands']} commands on {stats['hosts']} hosts, "
+            f"{stats['handshakes']} handshakes ({stats['handshakes_saved']} saved, {stats['reconnects']} reconnects)"
+        )